@@ -0,0 +1,57 @@
+"""Пропускная способность входа и регистрации на одно ядро.
+
+Для нескольких значений PASSWORD_HASH_ITERATIONS замеряются проверка
+пароля, POST на страницу входа и POST регистрации; в последней колонке
+— сколько таких запросов одно ядро успевает за секунду. Ограничение
+частоты запросов на время замера отключено.
+"""
+import itertools
+
+from common import measure, report, test_database
+
+from django.contrib.auth import get_user_model
+from django.test import Client, override_settings
+
+ITERATIONS = (100000, 260000, 600000)
+PASSWORD = 'bench-Pa55word'
+REPEAT = 20
+
+
+def bench_iterations(iterations, numbers):
+    with override_settings(
+        PASSWORD_HASH_ITERATIONS=iterations, RATE_LIMITS={}
+    ):
+        user = get_user_model().objects.create_user(
+            f'bench{iterations}', password=PASSWORD)
+        check = measure(lambda: user.check_password(PASSWORD), REPEAT)
+
+        client = Client()
+        data = {'username': user.username, 'password': PASSWORD}
+        login = measure(lambda: client.post('/auth/login/', data), REPEAT)
+
+        def register():
+            Client().post('/auth/registration/', {
+                'username': f'new{next(numbers)}',
+                'password1': PASSWORD,
+                'password2': PASSWORD,
+            })
+        registration = measure(register, REPEAT)
+    return check, login, registration
+
+
+def main():
+    numbers = itertools.count()
+    with test_database():
+        for iterations in ITERATIONS:
+            rows = [
+                (name, f'{elapsed:.1f} мс, {1000 / elapsed:.1f} в секунду')
+                for name, elapsed in zip(
+                    ('check_password', 'POST вход', 'POST регистрация'),
+                    bench_iterations(iterations, numbers),
+                )
+            ]
+            report(f'PASSWORD_HASH_ITERATIONS = {iterations}:', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Разделяемая и частная память воркеров ``manage.py serve``.
+
+Запускает сервер с gc.freeze() и без него, прогоняет запросы через каждого
+воркера и печатает медиану Shared/Private RSS по /proc/<pid>/smaps_rollup.
+Только для Linux.
+"""
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from common import report
+
+MANAGE = Path(__file__).resolve().parent.parent / 'blogicum' / 'manage.py'
+WORKERS = 4
+REQUESTS = 200
+URLS = ('/pages/about/', '/pages/rules/', '/auth/login/')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rollup(pid):
+    """Shared и Private память процесса в КиБ."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as fh:
+        for line in fh:
+            key, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[key] = int(rest.split()[0])
+    shared = values['Shared_Clean'] + values['Shared_Dirty']
+    private = values['Private_Clean'] + values['Private_Dirty']
+    return shared, private
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as fh:
+        return [int(child) for child in fh.read().split()]
+
+
+def wait_ready(port):
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/pages/about/')
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('Сервер не поднялся.')
+
+
+def run(freeze):
+    port = free_port()
+    command = [
+        sys.executable, str(MANAGE), 'serve', '--quiet',
+        f'--bind=127.0.0.1:{port}', f'--workers={WORKERS}',
+    ]
+    if not freeze:
+        command.append('--no-gc-freeze')
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        for i in range(REQUESTS):
+            url = URLS[i % len(URLS)]
+            urllib.request.urlopen(f'http://127.0.0.1:{port}{url}').read()
+        samples = [rollup(pid) for pid in children(server.pid)]
+    finally:
+        server.terminate()
+        server.wait()
+    shared = statistics.median(sample[0] for sample in samples)
+    private = statistics.median(sample[1] for sample in samples)
+    return f'shared {shared / 1024:.1f} МиБ, private {private / 1024:.1f} МиБ'
+
+
+def main():
+    report(
+        f'Память на воркера ({WORKERS} воркеров, {REQUESTS} запросов):',
+        [('gc.freeze()', run(True)), ('без freeze', run(False))],
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Накладные расходы сессии на запрос: db против cached_db.
+
+Для каждого движка авторизованный клиент запрашивает лёгкую страницу,
+считаются SQL-запросы к django_session и медианное время ответа.
+"""
+from common import measure, report, test_database
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+URL = '/pages/about/'
+REPEAT = 200
+
+
+def bench_engine(engine, user):
+    with override_settings(SESSION_ENGINE=engine):
+        client = Client()
+        client.force_login(user)
+        client.get(URL)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(URL)
+        session_queries = sum(
+            'django_session' in query['sql'] for query in queries)
+        elapsed = measure(lambda: client.get(URL), REPEAT)
+    return session_queries, elapsed
+
+
+def main():
+    with test_database():
+        user = get_user_model().objects.create_user('bench', password='x')
+        rows = []
+        for engine in ENGINES:
+            session_queries, elapsed = bench_engine(engine, user)
+            rows.append((
+                engine.rsplit('.', 1)[-1],
+                f'{session_queries} запрос(ов) к сессиям, '
+                f'{elapsed:.2f} мс на запрос',
+            ))
+        report(f'GET {URL}, авторизованный пользователь:', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,38 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.utils import timezone
 
-from .models import Category, Location, Post, Comment
+from .deletion import fan_out, remove
+from .models import (
+    Category, Location, Post, Comment, DeletionJob, OutboxMessage)
+
+
+class BulkDeleteMixin:
+    """Удаление через blog.deletion вместо сборщика Django.
+
+    Страница подтверждения показывает только число комментариев, не
+    перечисляя каждый связанный объект.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        comments = sum(fan_out(obj) for obj in objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        if comments:
+            model_count[Comment._meta.verbose_name_plural] = comments
+        return [str(obj) for obj in objs], model_count, set(), []
+
+    def delete_model(self, request, obj):
+        remove(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            remove(obj)
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(BulkDeleteMixin, admin.ModelAdmin):
     """Основные параметры админки отвечающие за раздел с постами."""
     list_display = (
         'title',
@@ -54,3 +82,42 @@ class CommentAdmin(admin.ModelAdmin):
         'author',
         'post'
     )
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Раздел админки с очередью исходящих писем."""
+    list_display = (
+        'subject',
+        'recipients',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('message', 'last_error')
+    actions = ('requeue',)
+
+    @admin.action(description='Отправить повторно')
+    def requeue(self, request, queryset):
+        queryset.exclude(status=OutboxMessage.SENT).update(
+            status=OutboxMessage.QUEUED,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """Раздел админки с очередью отложенных удалений."""
+    list_display = ('target', 'object_id', 'attempts', 'created_at')
+    readonly_fields = ('last_error',)
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class BlogUserAdmin(BulkDeleteMixin, UserAdmin):
+    """Пользователи удаляются быстрым путём, как и посты."""
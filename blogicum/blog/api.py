@@ -0,0 +1,161 @@
+"""Read-only JSON API для постов и комментариев.
+
+Ответы собираются из values()-проекций, без создания объектов моделей.
+Списки отдаются страницами по ключу (keyset), у каждого ответа есть ETag.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Count
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from blog.models import Category, Comment, Post
+from blog.pagination import InvalidCursor, keyset_page
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+POST_FIELDS = (
+    'id',
+    'title',
+    'text',
+    'pub_date',
+    'image',
+    'author__username',
+    'category__slug',
+    'location__name',
+    'location__is_published',
+    'comment_count',
+)
+
+COMMENT_FIELDS = (
+    'id',
+    'text',
+    'created_at',
+    'author__username',
+)
+
+
+def dumps(data):
+    """Сериализует данные в байты JSON самым быстрым доступным способом."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+def get_limit(request):
+    """Размер страницы из ?limit= с ограничением сверху."""
+    try:
+        limit = int(request.GET.get('limit', settings.PAGINATE_BY))
+    except ValueError:
+        limit = settings.PAGINATE_BY
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def post_row(row):
+    """Приводит строку values() поста к виду ответа API."""
+    location_is_published = row.pop('location__is_published')
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'text': row['text'],
+        'pub_date': row['pub_date'].isoformat(),
+        'image': default_storage.url(row['image']) if row['image'] else None,
+        'author': row['author__username'],
+        'category': row['category__slug'],
+        'location': (
+            row['location__name'] if location_is_published else None
+        ),
+        'comment_count': row['comment_count'],
+    }
+
+
+def comment_row(row):
+    """Приводит строку values() комментария к виду ответа API."""
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created_at': row['created_at'].isoformat(),
+        'author': row['author__username'],
+    }
+
+
+def error_response(message, status):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def page_response(request, queryset, field, to_row, descending):
+    """Отдаёт страницу queryset с курсором следующей и ETag."""
+    try:
+        rows, next_cursor = keyset_page(
+            queryset,
+            field,
+            cursor=request.GET.get('cursor'),
+            limit=get_limit(request),
+            descending=descending,
+        )
+    except InvalidCursor:
+        return error_response('Некорректный курсор.', 400)
+    body = dumps({
+        'results': [to_row(row) for row in rows],
+        'next': next_cursor,
+    })
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+    return response
+
+
+def published_post_rows():
+    return Post.objects.published().annotate(
+        comment_count=Count('comment')
+    ).values(*POST_FIELDS)
+
+
+@require_safe
+def post_list(request):
+    """Лента опубликованных постов, от новых к старым."""
+    return page_response(
+        request, published_post_rows(), 'pub_date', post_row, True
+    )
+
+
+@require_safe
+def category_post_list(request, category_slug):
+    """Опубликованные посты категории."""
+    category = Category.objects.filter(
+        slug=category_slug, is_published=True
+    ).values('id').first()
+    if category is None:
+        return error_response('Категория не найдена.', 404)
+    return page_response(
+        request,
+        published_post_rows().filter(category_id=category['id']),
+        'pub_date',
+        post_row,
+        True,
+    )
+
+
+@require_safe
+def comment_list(request, pk):
+    """Комментарии опубликованного поста, от старых к новым."""
+    if not Post.objects.published().filter(pk=pk).exists():
+        return error_response('Публикация не найдена.', 404)
+    return page_response(
+        request,
+        Comment.objects.filter(post_id=pk).values(*COMMENT_FIELDS),
+        'created_at',
+        comment_row,
+        False,
+    )
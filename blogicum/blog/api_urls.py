@@ -0,0 +1,13 @@
+from django.urls import path
+
+from blog import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', api.post_list, name='post_list'),
+    path('categories/<slug:category_slug>/posts/',
+         api.category_post_list,
+         name='category_post_list'),
+    path('posts/<int:pk>/comments/', api.comment_list, name='comment_list'),
+]
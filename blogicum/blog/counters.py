@@ -0,0 +1,159 @@
+"""Буферизованные счётчики просмотров постов.
+
+Просмотр только увеличивает счётчик в памяти (или в общем кеше).
+Накопленное записывается в БД одним UPDATE с CASE по всем постам после
+ответа на запрос, если прошло VIEW_COUNTER_FLUSH_INTERVAL секунд или
+набралось VIEW_COUNTER_FLUSH_THRESHOLD просмотров, а также при
+завершении процесса. При VIEW_COUNTER_FLUSH_IN_BACKGROUND запись идёт в
+отдельном потоке и не задерживает воркер после ответа.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.module_loading import import_string
+
+from blog.models import Post
+from blog.signals import views_flushed, worker_stopping
+
+
+class LocalViewCounter:
+    """Буфер просмотров в памяти процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.flusher = None
+
+    def increment(self, post_id):
+        with self.lock:
+            self.counts[post_id] += 1
+            self.pending += 1
+
+    def collect(self):
+        """Забирает накопленные приросты и очищает буфер."""
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+    def should_flush(self):
+        return self.pending and (
+            self.pending >= settings.VIEW_COUNTER_FLUSH_THRESHOLD
+            or time.monotonic() - self.last_flush
+            >= settings.VIEW_COUNTER_FLUSH_INTERVAL
+        )
+
+    def maybe_flush(self):
+        if not self.should_flush():
+            return
+        if not settings.VIEW_COUNTER_FLUSH_IN_BACKGROUND:
+            self.flush()
+            return
+        with self.lock:
+            if self.flusher is not None and self.flusher.is_alive():
+                return
+            self.flusher = threading.Thread(
+                target=self.flush_in_background, daemon=True
+            )
+            self.flusher.start()
+
+    def flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # У потока своё соединение с БД, оно не должно остаться висеть.
+            connections.close_all()
+
+    def drain(self):
+        """Дожидается фонового сброса и записывает остаток буфера."""
+        flusher = self.flusher
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+
+    def flush(self):
+        """Записывает буфер в БД; возвращает число обновлённых постов."""
+        with self.lock:
+            self.pending = 0
+            self.last_flush = time.monotonic()
+        counts = {pk: n for pk, n in self.collect().items() if n}
+        if not counts:
+            return 0
+        Post.objects.filter(pk__in=counts).update(views=F('views') + Case(
+            *(When(pk=pk, then=Value(n)) for pk, n in counts.items()),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        views_flushed.send(sender=self.__class__, counts=counts)
+        return len(counts)
+
+
+class CacheViewCounter(LocalViewCounter):
+    """Буфер просмотров в общем кеше для нескольких воркеров.
+
+    Счётчики лежат в кеше VIEW_COUNTER_CACHE, поэтому просмотры всех
+    воркеров складываются вместе; каждый воркер помнит, какие посты он
+    трогал, и при сбросе забирает из кеша накопленное по ним.
+    """
+
+    key_prefix = 'post-views'
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[settings.VIEW_COUNTER_CACHE]
+        self.dirty = set()
+
+    def key(self, post_id):
+        return f'{self.key_prefix}:{post_id}'
+
+    def increment(self, post_id):
+        key = self.key(post_id)
+        if not self.cache.add(key, 1, timeout=None):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.add(key, 1, timeout=None)
+        with self.lock:
+            self.dirty.add(post_id)
+            self.pending += 1
+
+    def collect(self):
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+        keys = {self.key(post_id): post_id for post_id in dirty}
+        counts = Counter()
+        for key, value in self.cache.get_many(keys).items():
+            if value:
+                # decr, а не delete: просмотры, пришедшие между get и
+                # decr от других воркеров, останутся в кеше.
+                self.cache.decr(key, value)
+                counts[keys[key]] = value
+        return counts
+
+
+@lru_cache(maxsize=None)
+def get_view_counter():
+    counter = import_string(settings.VIEW_COUNTER_BACKEND)()
+    atexit.register(counter.drain)
+    return counter
+
+
+def flush_after_request(**kwargs):
+    get_view_counter().maybe_flush()
+
+
+def drain(**kwargs):
+    get_view_counter().drain()
+
+
+request_finished.connect(flush_after_request)
+worker_stopping.connect(drain)
@@ -0,0 +1,177 @@
+"""Быстрое удаление постов и пользователей с большим числом комментариев.
+
+Стандартный delete() загружает все зависимые комментарии и посты в
+память и шлёт сигналы по каждому. Здесь они удаляются одним DELETE по
+условию, а то, что сделали бы обработчики их сигналов (статистика,
+рейтинг популярного, ссылки на файлы, кэш счётчиков пагинации),
+применяется агрегатами. Если комментариев больше
+BULK_DELETE_BACKGROUND_THRESHOLD, объект сразу скрывается, а само
+удаление ставится в очередь DeletionJob для manage.py process_deletions.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Q
+
+from blog import stats, storage, trending
+from blog.models import (
+    AuthorStats, CategoryStats, Comment, DeletionJob, Post, PostRank)
+from blog.pagination import invalidate_counts
+
+
+def raw_delete(queryset):
+    """Удаляет строки queryset одним DELETE, без загрузки объектов,
+    каскадов и сигналов; возвращает их число.
+
+    QuerySet.delete() для моделей с обработчиками сигналов загружает
+    каждую строку, поэтому здесь используется приватный _raw_delete.
+    Вызывающий код сам удаляет зависимые строки и поправляет то, что
+    сделали бы обработчики.
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def hide_posts(posts):
+    """Снимает посты с публикации одним UPDATE и поправляет статистику,
+    рейтинг популярного и кэш счётчиков пагинации.
+    """
+    rows = list(posts.filter(is_published=True).values_list(
+        'pk', 'author_id', 'category_id'
+    ))
+    if not rows:
+        return
+    ids = [pk for pk, _, _ in rows]
+    Post.objects.filter(pk__in=ids).update(is_published=False)
+    PostRank.objects.filter(post_id__in=ids).update(is_listed=False)
+    authors = {author_id for _, author_id, _ in rows}
+    categories = {category_id for _, _, category_id in rows}
+    stats.refresh(AuthorStats, authors)
+    stats.refresh(CategoryStats, categories)
+    invalidate_counts(
+        *(f'author:{pk}' for pk in authors),
+        *(f'category:{pk}' for pk in categories if pk is not None),
+    )
+
+
+def purge_comments(comments, update_ranks=True):
+    """Удаляет комментарии queryset одним запросом; возвращает их число.
+
+    update_ranks=False — для комментариев постов, которые удаляются
+    вместе с ними: их рейтинг пересчитывать незачем.
+    """
+    comments = comments.order_by()
+    if update_ranks:
+        trending.remove_comments(
+            comments.values_list('post_id', 'created_at').iterator()
+        )
+    for row in comments.values('author_id').annotate(n=Count('id')):
+        stats.bump(AuthorStats, row['author_id'], comments=-row['n'])
+    for row in comments.values('post__category_id').annotate(n=Count('id')):
+        stats.bump(
+            CategoryStats, row['post__category_id'], comments=-row['n']
+        )
+    return raw_delete(comments)
+
+
+def purge_posts(posts):
+    """Удаляет посты queryset вместе с комментариями и рейтингом."""
+    posts = posts.order_by()
+    purge_comments(Comment.objects.filter(post__in=posts), False)
+    for row in posts.exclude(image='').values('image').annotate(
+        n=Count('id')
+    ):
+        storage.add_reference(row['image'], -row['n'])
+    published = Counter()
+    namespaces = set()
+    for row in posts.values('author_id', 'category_id').annotate(
+        n=Count('id', filter=stats.published_q())
+    ):
+        published[AuthorStats, row['author_id']] += row['n']
+        published[CategoryStats, row['category_id']] += row['n']
+        namespaces.add(f'author:{row["author_id"]}')
+        namespaces.add(f'category:{row["category_id"]}')
+    raw_delete(PostRank.objects.filter(post__in=posts))
+    deleted = raw_delete(posts)
+    for (model, pk), count in published.items():
+        if count:
+            stats.bump(model, pk, posts=-count, refresh_last=True)
+    invalidate_counts(*namespaces)
+    return deleted
+
+
+def fan_out(obj):
+    """Сколько комментариев уйдёт вместе с объектом."""
+    if isinstance(obj, Post):
+        return obj.comment.count()
+    return Comment.objects.filter(Q(author=obj) | Q(post__author=obj)).count()
+
+
+def delete_now(obj):
+    with transaction.atomic():
+        if isinstance(obj, Post):
+            purge_comments(obj.comment.all(), update_ranks=False)
+        else:
+            purge_comments(
+                Comment.objects.filter(author=obj).exclude(post__author=obj)
+            )
+            purge_posts(obj.posts.all())
+        obj.delete()
+
+
+def remove(obj):
+    """Удаляет пост или пользователя.
+
+    Возвращает False, если удаление отложено: тогда пост снимается с
+    публикации, а пользователь блокируется и его посты тоже снимаются с
+    публикации до выполнения задачи.
+    """
+    if fan_out(obj) < settings.BULK_DELETE_BACKGROUND_THRESHOLD:
+        delete_now(obj)
+        return True
+    with transaction.atomic():
+        if isinstance(obj, Post):
+            obj.is_published = False
+            obj.save(update_fields=('is_published',))
+            target = DeletionJob.POST
+        else:
+            obj.is_active = False
+            obj.save(update_fields=('is_active',))
+            hide_posts(obj.posts.all())
+            target = DeletionJob.USER
+        DeletionJob.objects.create(target=target, object_id=obj.pk)
+    return False
+
+
+def drain(comments, chunk_size, update_ranks=True):
+    """Удаляет комментарии пачками по chunk_size, каждая в своей
+    транзакции, чтобы не держать блокировку долго.
+    """
+    while True:
+        with transaction.atomic():
+            ids = list(comments.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return
+            purge_comments(Comment.objects.filter(pk__in=ids), update_ranks)
+
+
+def run(job, chunk_size):
+    """Выполняет задачу удаления."""
+    model = Post if job.target == DeletionJob.POST else User
+    obj = model.objects.filter(pk=job.object_id).first()
+    if obj is not None:
+        if model is Post:
+            drain(obj.comment.all(), chunk_size, update_ranks=False)
+        else:
+            drain(
+                Comment.objects.filter(author=obj).exclude(post__author=obj),
+                chunk_size,
+            )
+            drain(
+                Comment.objects.filter(post__author=obj),
+                chunk_size,
+                update_ranks=False,
+            )
+        delete_now(obj)
+    job.delete()
@@ -0,0 +1,36 @@
+"""Страницы, которые можно кэшировать на общем прокси.
+
+Если прокси объявляет поддержку ESI заголовком Surrogate-Capability,
+страницы из EDGE_CACHE_VIEWS собираются для анонимного посетителя, а всё,
+что зависит от посетителя (меню, форма комментария с CSRF-токеном, ссылки
+автора поста и профиля), заменяется тегами <esi:include> на
+некэшируемые фрагменты blog:fragment. Ссылки у комментариев выводятся
+скрытыми для всех, а открывает их стиль из фрагмента меню, чтобы число
+фрагментов не росло с числом комментариев. Просмотры поста за прокси
+считает фрагмент post_actions. Такой каркас одинаков для всех и
+отдаётся с Cache-Control: public. Остальным клиентам фрагменты
+вставляются в страницу сразу, как раньше.
+"""
+from django.contrib.auth.models import AnonymousUser
+
+
+def is_edge_request(request):
+    return 'ESI/1.0' in request.headers.get('Surrogate-Capability', '')
+
+
+def is_shell(request):
+    """Собирается ли сейчас общий для всех каркас страницы."""
+    return getattr(request, 'edge_shell', False)
+
+
+def enter_shell(request):
+    request.visitor = request.user
+    request.user = AnonymousUser()
+    request.edge_shell = True
+
+
+def leave_shell(request):
+    """Возвращает обычную сборку страницы для текущего посетителя."""
+    if is_shell(request):
+        request.user = request.visitor
+        request.edge_shell = False
@@ -0,0 +1,140 @@
+"""Форматы выгрузки и загрузки данных блога (export_blog, import_blog).
+
+Каждая таблица выгружается в свой файл построчно. Пользователи,
+категории и места загружаются по естественным ключам (username, slug,
+название места), поэтому в другой базе у них могут быть другие id. Посты
+и комментарии естественного ключа не имеют и загружаются с прежними id:
+в базе-приёмнике эти id должны быть свободны.
+"""
+import json
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+
+from blog.models import (
+    Category, Comment, Location, Post, render_excerpt, render_html)
+
+# Имя выгрузки -> (модель, поле времени для --since, поля, внешние ключи).
+# Порядок задаёт порядок загрузки: сначала то, на что ссылаются.
+TABLES = {
+    'users': (
+        User,
+        'date_joined',
+        ('id', 'username', 'first_name', 'last_name', 'email',
+         'is_active', 'date_joined'),
+        {},
+    ),
+    'categories': (
+        Category,
+        'created_at',
+        ('id', 'title', 'description', 'slug', 'is_published',
+         'created_at'),
+        {},
+    ),
+    'locations': (
+        Location,
+        'created_at',
+        ('id', 'name', 'is_published', 'created_at'),
+        {},
+    ),
+    'posts': (
+        Post,
+        'created_at',
+        ('id', 'title', 'text', 'pub_date', 'image', 'is_published',
+         'views', 'created_at'),
+        {
+            'author': 'author__username',
+            'category': 'category__slug',
+            'location': 'location__name',
+        },
+    ),
+    'comments': (
+        Comment,
+        'created_at',
+        ('id', 'text', 'created_at'),
+        {
+            'post': 'post_id',
+            'author': 'author__username',
+        },
+    ),
+}
+
+# Таблицы, которые загружаются с прежними id, как в loaddata.
+KEEP_IDS = ('posts', 'comments')
+
+
+def columns(name):
+    _, _, fields, relations = TABLES[name]
+    return (*fields, *relations)
+
+
+def export_rows(name, since=None, chunk_size=2000):
+    """Строки таблицы name словарями, без загрузки таблицы в память.
+
+    Имена полей в них такие же, как в columns(name).
+    """
+    model, time_field, fields, relations = TABLES[name]
+    rows = model.objects.order_by('pk')
+    if since is not None:
+        rows = rows.filter(**{f'{time_field}__gte': since})
+    rows = rows.values(*fields, *relations.values())
+    for row in rows.iterator(chunk_size=chunk_size):
+        for key, path in relations.items():
+            row[key] = row.pop(path)
+        yield row
+
+
+def import_files(directory, name):
+    """Файлы выгрузки таблицы name в каталоге, сжатые или нет."""
+    return [
+        path for path in (
+            directory / f'{name}.jsonl', directory / f'{name}.jsonl.gz'
+        )
+        if path.exists()
+    ]
+
+
+def parse_row(name, row):
+    """Приводит строку выгрузки к значениям полей модели.
+
+    Бросает ValidationError, если значение не подходит полю.
+    """
+    model, _, fields, relations = TABLES[name]
+    values = {}
+    for key in fields:
+        if key == 'id' and name not in KEEP_IDS:
+            continue
+        field = model._meta.get_field(key)
+        if key not in row:
+            if not (field.has_default() or field.blank):
+                raise ValidationError(f'нет поля {key}')
+            continue
+        value = field.to_python(row[key])
+        if value is None and not field.null:
+            raise ValidationError(f'пустое поле {key}')
+        if field.max_length and value and len(value) > field.max_length:
+            raise ValidationError(f'слишком длинное поле {key}')
+        values[key] = value
+    for key in relations:
+        values[key] = row.get(key)
+    if name == 'posts':
+        values['excerpt'] = render_excerpt(values['text'])
+        values['text_html'] = render_html(values['text'])
+    return values
+
+
+def parse_batch(task):
+    """Разбирает пачку строк JSONL: (значения, ошибки, число строк).
+
+    Вызывается и в дочерних процессах, поэтому не трогает БД.
+    """
+    name, first_line, lines = task
+    rows, errors = [], []
+    for number, line in enumerate(lines, first_line):
+        if not line.strip():
+            continue
+        try:
+            rows.append(parse_row(name, json.loads(line)))
+        except (ValueError, ValidationError) as error:
+            errors.append(f'{name}:{number}: {error}')
+    return rows, errors, len(lines)
@@ -0,0 +1,24 @@
+"""Хешер паролей с настраиваемой стоимостью.
+
+Число итераций PBKDF2 берётся из PASSWORD_HASH_ITERATIONS, так что цену
+входа можно подобрать под мощность серверов (см.
+benchmarks/bench_login.py). Хеши с другим числом итераций Django сам
+пересчитывает при успешном входе: must_update сравнивает число итераций
+на неравенство, поэтому работает и повышение, и понижение стоимости.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 с числом итераций из настроек.
+
+    Алгоритм тот же, что у стандартного хешера, поэтому старые хеши
+    проверяются без миграции; стандартный хешер в PASSWORD_HASHERS
+    указывать не нужно — у двух хешеров с одним именем алгоритма
+    выигрывает последний.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
@@ -0,0 +1,54 @@
+"""Очередь исходящей почты в БД.
+
+OutboxEmailBackend вместо отправки сохраняет письма в OutboxMessage в той
+же транзакции, что и остальная работа запроса. Доставляет их команда
+``manage.py send_outbox`` через OUTBOX_DELIVERY_BACKEND, пачками и по
+одному соединению на пачку.
+"""
+import email
+
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import MIMEMixin
+
+from blog.models import OutboxMessage
+
+
+class StoredMIMEMessage(MIMEMixin, email.message.Message):
+    """Разобранное сохранённое письмо с as_bytes(linesep=...) как у Django."""
+
+
+class StoredEmailMessage(EmailMessage):
+    """Письмо из очереди в виде, понятном любому почтовому бэкенду."""
+
+    def __init__(self, outbox_message):
+        super().__init__(
+            subject=outbox_message.subject,
+            from_email=outbox_message.from_email,
+            to=outbox_message.recipients,
+        )
+        self.raw = bytes(outbox_message.message)
+
+    def message(self):
+        return email.message_from_bytes(self.raw, _class=StoredMIMEMessage)
+
+    def recipients(self):
+        return self.to
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь вместо немедленной отправки."""
+
+    def send_messages(self, email_messages):
+        queued = [
+            OutboxMessage(
+                from_email=message.from_email,
+                recipients=message.recipients(),
+                subject=message.subject,
+                message=message.message().as_bytes(),
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxMessage.objects.bulk_create(queued)
+        return len(queued)
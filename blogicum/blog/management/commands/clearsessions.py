@@ -0,0 +1,44 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии из БД небольшими пачками, '
+        'не удерживая блокировку таблицы надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько сессий удалять за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.05,
+            help='Пауза между пачками в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        total = 0
+        while True:
+            keys = list(
+                expired.values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            with transaction.atomic():
+                deleted, _ = Session.objects.filter(
+                    session_key__in=keys
+                ).delete()
+            total += deleted
+            if len(keys) < batch_size:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(f'Удалено истёкших сессий: {total}')
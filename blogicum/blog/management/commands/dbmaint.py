@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+# Значения PRAGMA auto_vacuum.
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def backup(source, path, pages, pause):
+    """Копирует БД source в path через backup API по pages страниц за
+    шаг, отпуская БД на pause секунд между шагами.
+
+    Копия пишется во временный файл и появляется под именем path, только
+    если прошла проверку целостности.
+    """
+    temporary = path.with_name(path.name + '.part')
+    target = sqlite3.connect(temporary)
+    try:
+        # Пауза в progress: параметр sleep у backup() действует только
+        # при занятой БД, а уступать пишущим нужно между любыми шагами.
+        source.backup(
+            target, pages=pages,
+            progress=lambda status, remaining, total: time.sleep(pause),
+        )
+        result = target.execute('PRAGMA quick_check').fetchone()[0]
+    finally:
+        target.close()
+    if result != 'ok':
+        os.remove(temporary)
+        raise CommandError(f'Копия {path} повреждена: {result}')
+    os.replace(temporary, path)
+
+
+def rotate(directory, keep):
+    """Удаляет старые копии, оставляя keep последних."""
+    backups = sorted(directory.glob('db-*.sqlite3'))
+    for path in backups[:max(len(backups) - keep, 0)]:
+        path.unlink()
+
+
+def incremental_vacuum(cursor, pages, pause):
+    """Возвращает свободные страницы файлу по pages за шаг; возвращает
+    их число.
+    """
+    start = free = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+    while free:
+        # PRAGMA incremental_vacuum освобождает по странице на каждый шаг
+        # выполнения, поэтому результат нужно дочитать до конца.
+        cursor.execute(f'PRAGMA incremental_vacuum({pages})').fetchall()
+        left = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+        if left >= free:
+            break
+        free = left
+        if free:
+            time.sleep(pause)
+    return start - free
+
+
+def index_sizes(cursor):
+    """Размер и заполненность таблиц и индексов: (имя, страниц, доля
+    занятого места). Пусто, если SQLite собран без dbstat.
+    """
+    try:
+        return cursor.execute(
+            'SELECT name, COUNT(*), SUM(pgsize - unused) * 1.0 / SUM(pgsize) '
+            'FROM dbstat GROUP BY name ORDER BY COUNT(*) DESC'
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+class Command(BaseCommand):
+    help = (
+        'Обслуживание SQLite без остановки сайта: резервная копия через '
+        'backup API небольшими шагами, ANALYZE или PRAGMA optimize, '
+        'пошаговый incremental vacuum и отчёт о фрагментации и индексах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним БД из DATABASES.',
+        )
+        parser.add_argument(
+            '--backup', metavar='DIR',
+            help='Сделать резервную копию в каталог DIR.',
+        )
+        parser.add_argument(
+            '--keep', type=int, default=7,
+            help='Сколько последних копий хранить.',
+        )
+        parser.add_argument(
+            '--pages', type=int, default=256,
+            help='Сколько страниц копировать или освобождать за шаг.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между шагами в секундах.',
+        )
+        parser.add_argument(
+            '--optimize', action='store_true',
+            help='Выполнить PRAGMA optimize: обновить статистику '
+                 'планировщика там, где она устарела.',
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Выполнить полный ANALYZE.',
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Вернуть свободные страницы через incremental vacuum.',
+        )
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help='Перевести БД в режим auto_vacuum=INCREMENTAL. Требует '
+                 'одного полного VACUUM, который блокирует БД.',
+        )
+        parser.add_argument(
+            '--loop', type=float, default=0,
+            help='Работать постоянно, повторяя обслуживание раз в N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('dbmaint работает только с SQLite.')
+        while True:
+            self.maintain(connection, options)
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
+
+    def maintain(self, connection, options):
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            if options['backup']:
+                directory = Path(options['backup'])
+                directory.mkdir(parents=True, exist_ok=True)
+                path = directory / timezone.now().strftime(
+                    'db-%Y%m%d-%H%M%S-%f.sqlite3'
+                )
+                backup(
+                    connection.connection, path,
+                    options['pages'], options['pause'],
+                )
+                rotate(directory, options['keep'])
+                self.stdout.write(f'Резервная копия: {path}')
+            if options['enable_incremental_vacuum']:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+            if options['vacuum']:
+                self.vacuum(cursor, options)
+            if options['analyze']:
+                cursor.execute('ANALYZE')
+            elif options['optimize']:
+                cursor.execute('PRAGMA optimize')
+            self.report(cursor)
+
+    def vacuum(self, cursor, options):
+        mode = cursor.execute('PRAGMA auto_vacuum').fetchone()[0]
+        if mode != AUTO_VACUUM_INCREMENTAL:
+            self.stderr.write(
+                'incremental vacuum недоступен: запустите один раз с '
+                '--enable-incremental-vacuum.'
+            )
+            return
+        released = incremental_vacuum(
+            cursor, options['pages'], options['pause']
+        )
+        self.stdout.write(f'Освобождено страниц: {released}')
+
+    def report(self, cursor):
+        page_size = cursor.execute('PRAGMA page_size').fetchone()[0]
+        pages = cursor.execute('PRAGMA page_count').fetchone()[0]
+        free = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+        self.stdout.write(
+            f'Размер: {pages * page_size / 1024 / 1024:.1f} МБ, '
+            f'свободных страниц: {free} ({free / max(pages, 1):.1%})'
+        )
+        for name, count, fill in index_sizes(cursor):
+            self.stdout.write(
+                f'  {name}: страниц {count}, заполнено {fill or 0:.0%}'
+            )
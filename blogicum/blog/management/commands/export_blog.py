@@ -0,0 +1,92 @@
+import csv
+import datetime as dt
+import gzip
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.exchange import TABLES, columns, export_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает пользователей, категории, места, посты и '
+        'комментарии в JSONL или CSV, по файлу на таблицу. Память не '
+        'зависит от размера таблиц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', help='Каталог, куда писать файлы.',
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl',
+            help='Формат файлов.',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать файлы gzip.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Выгрузить только записи, созданные начиная с этого '
+                 'момента (ISO 8601).',
+        )
+        parser.add_argument(
+            '--tables', nargs='+', choices=tuple(TABLES),
+            default=tuple(TABLES),
+            help='Какие таблицы выгружать.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из БД за раз.',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('--since ожидает дату в формате ISO 8601.')
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, dt.timezone.utc)
+        output = Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        for name in TABLES:
+            if name not in options['tables']:
+                continue
+            path = output / f'{name}.{options["format"]}'
+            if options['gzip']:
+                path = path.with_name(path.name + '.gz')
+            rows = export_rows(name, since, options['chunk_size'])
+            total = self.write(path, name, rows, options)
+            self.stdout.write(f'{path}: {total}')
+
+    def write(self, path, name, rows, options):
+        opener = gzip.open if options['gzip'] else open
+        total = 0
+        with opener(path, 'wt', encoding='utf-8', newline='') as file:
+            if options['format'] == 'csv':
+                writer = csv.DictWriter(file, fieldnames=columns(name))
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow({
+                        key: (
+                            value.isoformat()
+                            if isinstance(value, dt.datetime) else value
+                        )
+                        for key, value in row.items()
+                    })
+                    total += 1
+            else:
+                for row in rows:
+                    file.write(json.dumps(
+                        row, cls=DjangoJSONEncoder, ensure_ascii=False
+                    ))
+                    file.write('\n')
+                    total += 1
+        return total
@@ -0,0 +1,112 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.models import MediaFile, Post
+
+
+def scan(root):
+    """Обходит дерево root через os.scandir: (путь от root, stat)."""
+    stack = ['']
+    while stack:
+        relative = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, relative))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = f'{relative}/{entry.name}' if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry.stat(follow_symlinks=False)
+
+
+def remove(root, names, deadline):
+    """Удаляет файлы names, кроме тронутых после deadline: повторная
+    загрузка того же содержимого обновляет время изменения файла.
+    """
+    removed = []
+    for name in names:
+        path = os.path.join(root, name)
+        try:
+            if os.stat(path).st_mtime >= deadline:
+                continue
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed.append(name)
+    return removed
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из MEDIA_ROOT файлы, на которые не ссылается ни один '
+        'пост и которые старше периода ожидания.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE,
+            help='Не трогать файлы моложе стольких секунд.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько файлов удалять одной задачей.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков удаления.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что было бы удалено.',
+        )
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        referenced = set(
+            Post.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).iterator()
+        )
+        deadline = time.time() - options['grace']
+        orphans = []
+        size = 0
+        for name, stat in scan(root):
+            if name not in referenced and stat.st_mtime < deadline:
+                orphans.append(name)
+                size += stat.st_size
+        if options['dry_run']:
+            for name in orphans:
+                self.stdout.write(name)
+            self.stdout.write(
+                f'Будет удалено файлов: {len(orphans)}, '
+                f'{size / 1024 / 1024:.1f} МБ'
+            )
+            return
+        batch_size = options['batch_size']
+        batches = [
+            orphans[start:start + batch_size]
+            for start in range(0, len(orphans), batch_size)
+        ]
+        removed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            tasks = []
+            for names in batches:
+                # Пока шёл обход, на файлы могли сослаться новые посты.
+                names = set(names).difference(Post.objects.filter(
+                    image__in=names
+                ).values_list('image', flat=True))
+                tasks.append(pool.submit(remove, root, names, deadline))
+            for task in tasks:
+                names = task.result()
+                MediaFile.objects.filter(name__in=names).delete()
+                removed += len(names)
+        self.stdout.write(
+            f'Удалено файлов: {removed}, {size / 1024 / 1024:.1f} МБ'
+        )
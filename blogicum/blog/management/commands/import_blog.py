@@ -0,0 +1,345 @@
+import gzip
+import json
+import os
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, Value, When
+
+from blog import storage, trending
+from blog.exchange import TABLES, import_files, parse_batch
+from blog.missing import forget_miss
+from blog.models import (
+    AuthorStats, Category, CategoryStats, Comment, Location, Post)
+from blog.pagination import invalidate_counts
+from blog.stats import reconcile, refresh
+
+# Сколько ключей пересчитывать за раз после загрузки.
+FINISH_CHUNK_SIZE = 500
+
+# Имя выгрузки -> поле естественного ключа для таблиц, которые
+# загружаются без прежних id.
+NATURAL_KEYS = {
+    'users': 'username',
+    'categories': 'slug',
+    'locations': 'name',
+}
+
+
+def read_batches(path, name, skip, batch_size):
+    """Пачки строк файла (таблица, номер первой строки, строки),
+    начиная со строки skip + 1.
+    """
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as file:
+        lines = islice(file, skip, None)
+        first = skip + 1
+        while True:
+            batch = list(islice(lines, batch_size))
+            if not batch:
+                return
+            yield name, first, batch
+            first += len(batch)
+
+
+def chunked(keys):
+    keys = list(keys)
+    for start in range(0, len(keys), FINISH_CHUNK_SIZE):
+        yield keys[start:start + FINISH_CHUNK_SIZE]
+
+
+def restore_times(model, key, times):
+    """Возвращает записям время создания из выгрузки: bulk_create
+    заменяет значение auto_now_add текущим временем.
+    """
+    if times:
+        model.objects.filter(**{f'{key}__in': times}).update(
+            created_at=Case(
+                *(When(**{key: pk}, then=Value(moment))
+                  for pk, moment in times.items()),
+                output_field=model._meta.get_field('created_at'),
+            )
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные из файлов export_blog (JSONL, можно .gz). Файлы '
+        'читаются потоково, разбор можно распараллелить по процессам, '
+        'запись идёт пачками в транзакциях. Прогресс сохраняется в файл '
+        'контрольной точки, и прерванная загрузка продолжается с места '
+        'остановки. Посты и комментарии сохраняют id из выгрузки; если '
+        'такие id в базе уже заняты, загрузка останавливается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', help='Каталог с файлами выгрузки.',
+        )
+        parser.add_argument(
+            '--tables', nargs='+', choices=tuple(TABLES),
+            default=tuple(TABLES),
+            help='Какие таблицы загружать.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк записывать одной транзакцией.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов разбора строк.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки; по умолчанию '
+                 '.import_blog.json в каталоге выгрузки.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать заново, не глядя на контрольную точку.',
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['input'])
+        if not directory.is_dir():
+            raise CommandError(f'Нет каталога {directory}.')
+        self.checkpoint_path = Path(
+            options['checkpoint'] or directory / '.import_blog.json'
+        )
+        self.checkpoint = {'lines': {}, 'finished': True}
+        if not options['restart'] and self.checkpoint_path.exists():
+            self.checkpoint = json.loads(self.checkpoint_path.read_text())
+        # Прошлый запуск прервался до пересчёта: что он успел загрузить,
+        # неизвестно, поэтому счётчики и рейтинги пересчитываются целиком.
+        self.full_finish = not self.checkpoint['finished']
+        self.checkpoint['finished'] = False
+        self.maps = {
+            'users': dict(User.objects.values_list('username', 'pk')),
+            'categories': dict(Category.objects.values_list('slug', 'pk')),
+            'locations': dict(
+                Location.objects.order_by('-pk').values_list('name', 'pk')
+            ),
+        }
+        self.touched = {
+            'posts': set(), 'authors': set(), 'categories': set(),
+            'images': set(),
+        }
+        self.keys = {'users': set(), 'categories': set()}
+        pool = None
+        if options['workers'] > 1:
+            # Дочерние процессы не должны унаследовать открытое соединение.
+            connections.close_all()
+            pool = Pool(options['workers'])
+        try:
+            for name in TABLES:
+                if name not in options['tables']:
+                    continue
+                for path in import_files(directory, name):
+                    total = self.load_file(path, name, pool, options)
+                    self.stdout.write(f'{path}: {total}')
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        self.reset_sequences()
+        self.finish()
+        self.checkpoint['finished'] = True
+        self.save_checkpoint()
+
+    def load_file(self, path, name, pool, options):
+        done = self.checkpoint['lines'].get(path.name, 0)
+        # Пачка могла быть записана, а контрольная точка — нет: в первой
+        # пачке после возобновления уже загруженные строки пропускаются.
+        resumed = done > 0
+        tasks = read_batches(path, name, done, options['batch_size'])
+        total = 0
+        while True:
+            if pool is None:
+                window = [parse_batch(task) for task in islice(tasks, 1)]
+            else:
+                # Окно из нескольких пачек на процесс: файл не читается в
+                # память целиком, а процессы не простаивают.
+                window = pool.map(
+                    parse_batch, list(islice(tasks, options['workers'] * 2))
+                )
+            if not window:
+                return total
+            for rows, errors, lines in window:
+                for error in errors:
+                    self.stderr.write(error)
+                with transaction.atomic():
+                    total += self.load(name, rows, resumed)
+                resumed = False
+                done += lines
+                self.checkpoint['lines'][path.name] = done
+                self.save_checkpoint()
+
+    def save_checkpoint(self):
+        temporary = self.checkpoint_path.with_name(
+            self.checkpoint_path.name + '.tmp'
+        )
+        temporary.write_text(json.dumps(self.checkpoint))
+        os.replace(temporary, self.checkpoint_path)
+
+    def load(self, name, rows, resumed):
+        if name in NATURAL_KEYS:
+            return self.load_natural(name, rows)
+        rows = self.new_rows(name, rows, resumed)
+        if name == 'posts':
+            return self.load_posts(rows)
+        return self.load_comments(rows)
+
+    def new_rows(self, name, rows, resumed):
+        """Строки, id которых свободны. Занятый id — ошибка, кроме
+        первой пачки после возобновления.
+        """
+        model = TABLES[name][0]
+        taken = set(model.objects.filter(
+            pk__in=[row['id'] for row in rows]
+        ).values_list('pk', flat=True))
+        if taken and not resumed:
+            raise CommandError(
+                f'{name}: id {", ".join(map(str, sorted(taken)[:10]))} '
+                'уже заняты в базе. Посты и комментарии загружаются с id '
+                'из выгрузки, поэтому загружать их можно только в базу, '
+                'где этих id нет.'
+            )
+        return [row for row in rows if row['id'] not in taken]
+
+    def load_natural(self, name, rows):
+        model = TABLES[name][0]
+        key = NATURAL_KEYS[name]
+        known = self.maps[name]
+        new = {}
+        for row in rows:
+            if row[key] not in known:
+                new.setdefault(row[key], row)
+        if not new:
+            return 0
+        objects = [model(**row) for row in new.values()]
+        if model is User:
+            for user in objects:
+                user.password = make_password(None)
+        model.objects.bulk_create(objects)
+        # На SQLite bulk_create не возвращает id, берём их запросом.
+        known.update(
+            model.objects.filter(**{f'{key}__in': new}).values_list(key, 'pk')
+        )
+        if model is not User:
+            restore_times(model, key, {
+                value: row['created_at'] for value, row in new.items()
+                if row.get('created_at')
+            })
+        if name in self.keys:
+            self.keys[name].update(new)
+        return len(new)
+
+    def resolve(self, row, key, name, required=False):
+        value = row.pop(key)
+        if value is None and not required:
+            return True
+        row[f'{key}_id'] = self.maps[name].get(value)
+        if row[f'{key}_id'] is None:
+            self.stderr.write(f'{name}: не найдено {value!r}')
+            return False
+        return True
+
+    def load_posts(self, rows):
+        posts = []
+        for row in rows:
+            if (
+                self.resolve(row, 'author', 'users', required=True)
+                and self.resolve(row, 'category', 'categories')
+                and self.resolve(row, 'location', 'locations')
+            ):
+                posts.append(Post(**row))
+        # bulk_create перезапишет created_at, запоминаем его заранее.
+        times = {post.pk: post.created_at for post in posts if post.created_at}
+        Post.objects.bulk_create(posts)
+        restore_times(Post, 'pk', times)
+        for post in posts:
+            self.touched['posts'].add(post.pk)
+            self.touched['authors'].add(post.author_id)
+            self.touched['categories'].add(post.category_id)
+            if post.image:
+                self.touched['images'].add(post.image.name)
+        return len(posts)
+
+    def load_comments(self, rows):
+        categories = dict(Post.objects.filter(
+            pk__in={row['post'] for row in rows}
+        ).values_list('pk', 'category_id'))
+        comments = []
+        for row in rows:
+            post = row.pop('post')
+            if post not in categories:
+                self.stderr.write(f'comments: не найден пост {post!r}')
+                continue
+            row['post_id'] = post
+            if self.resolve(row, 'author', 'users', required=True):
+                comments.append(Comment(**row))
+        times = {
+            comment.pk: comment.created_at
+            for comment in comments if comment.created_at
+        }
+        Comment.objects.bulk_create(comments)
+        restore_times(Comment, 'pk', times)
+        for comment in comments:
+            self.touched['posts'].add(comment.post_id)
+            self.touched['authors'].add(comment.author_id)
+            self.touched['categories'].add(categories[comment.post_id])
+        return len(comments)
+
+    def reset_sequences(self):
+        """Посты и комментарии вставлены с id из выгрузки: сдвигаем
+        последовательности первичных ключей, как это делает loaddata.
+        """
+        connection = connections[DEFAULT_DB_ALIAS]
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def finish(self):
+        """bulk_create обходит сигналы: пересчитываем то, что ведут их
+        обработчики, для затронутых загрузкой записей.
+        """
+        if self.full_finish:
+            for model in (AuthorStats, CategoryStats):
+                reconcile(model)
+            call_command('rebuild_trending', stdout=self.stdout)
+            storage.recount_references()
+        else:
+            for model, keys in (
+                (AuthorStats, self.touched['authors']),
+                (CategoryStats, self.touched['categories']),
+            ):
+                for chunk in chunked(keys):
+                    refresh(model, chunk)
+            for chunk in chunked(self.touched['posts']):
+                trending.rebuild_ranks(list(
+                    Post.objects.filter(pk__in=chunk).select_related(
+                        'category'
+                    )
+                ))
+            for chunk in chunked(self.touched['images']):
+                storage.recount_references(chunk)
+        invalidate_counts(
+            *(f'author:{pk}' for pk in self.touched['authors']),
+            *(f'category:{pk}' for pk in self.touched['categories']
+              if pk is not None),
+        )
+        for username in self.keys['users']:
+            forget_miss('user', username)
+        for slug in self.keys['categories']:
+            forget_miss('category', slug)
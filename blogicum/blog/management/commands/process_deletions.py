@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.deletion import run
+from blog.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет отложенные удаления постов и пользователей: '
+        'комментарии удаляются пачками, каждая в своей транзакции. После '
+        'BULK_DELETE_MAX_ATTEMPTS неудач задача больше не выполняется и '
+        'ждёт разбора в админке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.BULK_DELETE_CHUNK_SIZE,
+            help='Сколько комментариев удалять за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--loop', type=float, default=0,
+            help='Работать постоянно, проверяя очередь раз в N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            jobs = DeletionJob.objects.filter(
+                attempts__lt=settings.BULK_DELETE_MAX_ATTEMPTS
+            ).order_by('id')
+            for job in jobs:
+                try:
+                    run(job, options['chunk_size'])
+                except Exception as error:
+                    job.attempts += 1
+                    job.last_error = f'{type(error).__name__}: {error}'
+                    job.save(update_fields=('attempts', 'last_error'))
+                    self.stderr.write(f'{job}: {job.last_error}')
+                else:
+                    self.stdout.write(f'Удалено: {job}')
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post, PostRank
+from blog.trending import rebuild_ranks
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных постов с нуля. Нужен после '
+        'загрузки данных в обход сигналов; в обычной работе рейтинг '
+        'обновляется событиями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов обрабатывать за раз.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        posts = Post.objects.select_related('category').order_by('pk')
+        total = 0
+        with transaction.atomic():
+            PostRank.objects.all().delete()
+            chunk = []
+            for post in posts.iterator(chunk_size=chunk_size):
+                chunk.append(post)
+                if len(chunk) == chunk_size:
+                    total += self.rebuild(chunk)
+                    chunk = []
+            if chunk:
+                total += self.rebuild(chunk)
+        self.stdout.write(f'Пересчитано рейтингов: {total}')
+
+    def rebuild(self, posts):
+        rebuild_ranks(posts)
+        return len(posts)
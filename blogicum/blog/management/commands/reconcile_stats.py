@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import AuthorStats, CategoryStats
+from blog.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики авторов и категорий с данными. Запускается по '
+        'расписанию: подхватывает отложенные публикации, у которых '
+        'наступила дата, и исправляет расхождения после загрузки данных '
+        'в обход сигналов.'
+    )
+
+    def handle(self, *args, **options):
+        for model in (AuthorStats, CategoryStats):
+            total = reconcile(model)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {total}'
+            )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post, render_excerpt, render_html
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает анонсы и HTML текста постов. Нужен после '
+        'изменения текстов в обход Post.save() или правил рендеринга.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов обновлять одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        posts = Post.objects.only('id', 'text').order_by('pk')
+        total = 0
+        chunk = []
+        for post in posts.iterator(chunk_size=chunk_size):
+            post.excerpt = render_excerpt(post.text)
+            post.text_html = render_html(post.text)
+            chunk.append(post)
+            if len(chunk) == chunk_size:
+                total += self.save(chunk)
+                chunk = []
+        if chunk:
+            total += self.save(chunk)
+        self.stdout.write(f'Обновлено постов: {total}')
+
+    def save(self, posts):
+        Post.objects.bulk_update(posts, ('excerpt', 'text_html'))
+        return len(posts)
@@ -0,0 +1,113 @@
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.mail import StoredEmailMessage
+from blog.models import OutboxMessage
+
+
+class Command(BaseCommand):
+    help = (
+        'Доставляет письма из очереди пачками через '
+        'OUTBOX_DELIVERY_BACKEND. Неудачные попытки повторяются с '
+        'растущей паузой, после OUTBOX_MAX_ATTEMPTS письмо помечается '
+        'недоставленным. Перед отправкой пачка забирается одним '
+        'UPDATE, так что параллельные запуски не отправят письмо дважды.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько писем отправлять через одно соединение.',
+        )
+        parser.add_argument(
+            '--loop', type=float, default=0,
+            help='Работать постоянно, проверяя очередь раз в N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.deliver_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено: {sent}, с ошибкой: {failed}'
+                )
+            if sent + failed == options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
+
+    def claim(self, batch_size, now):
+        """Забирает до batch_size писем, готовых к отправке, и возвращает
+        их. Взятые другим запуском письма пропускаются, пока взятие не
+        устареет через OUTBOX_CLAIM_TIMEOUT секунд.
+        """
+        free = Q(claimed_at__isnull=True) | Q(claimed_at__lt=(
+            now - timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+        ))
+        ready = OutboxMessage.objects.filter(
+            free, status=OutboxMessage.QUEUED, next_attempt_at__lte=now,
+        )
+        ids = list(ready.order_by('next_attempt_at', 'id').values_list(
+            'pk', flat=True
+        )[:batch_size])
+        if not ids:
+            return []
+        token = uuid4().hex
+        # Условие повторяется в UPDATE: письма, которые между выборкой и
+        # записью забрал другой запуск, не достанутся этому.
+        ready.filter(pk__in=ids).update(claimed_by=token, claimed_at=now)
+        return list(OutboxMessage.objects.filter(
+            pk__in=ids, claimed_by=token
+        ).order_by('next_attempt_at', 'id'))
+
+    def deliver_batch(self, batch_size):
+        now = timezone.now()
+        batch = self.claim(batch_size, now)
+        if not batch:
+            return 0, 0
+        sent = failed = 0
+        connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND)
+        try:
+            connection.open()
+        except Exception as error:
+            for message in batch:
+                self.fail(message, error, now)
+            failed = len(batch)
+        else:
+            for message in batch:
+                try:
+                    connection.send_messages([StoredEmailMessage(message)])
+                except Exception as error:
+                    self.fail(message, error, now)
+                    failed += 1
+                else:
+                    message.status = OutboxMessage.SENT
+                    message.sent_at = timezone.now()
+                    message.last_error = ''
+                    sent += 1
+            connection.close()
+        for message in batch:
+            message.claimed_by = ''
+            message.claimed_at = None
+        OutboxMessage.objects.bulk_update(batch, (
+            'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at',
+            'claimed_by', 'claimed_at',
+        ))
+        return sent, failed
+
+    def fail(self, message, error, now):
+        message.attempts += 1
+        message.last_error = f'{type(error).__name__}: {error}'
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.status = OutboxMessage.FAILED
+        else:
+            delay = settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1)
+            message.next_attempt_at = now + timedelta(seconds=delay)
@@ -0,0 +1,180 @@
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.signals import worker_stopping
+
+# Пауза перед перезапуском упавшего воркера удваивается с каждым падением
+# за последние CRASH_WINDOW секунд; если падений больше MAX_CRASHES,
+# сервер останавливается.
+RESPAWN_DELAY = 0.5
+RESPAWN_DELAY_MAX = 30
+CRASH_WINDOW = 60
+MAX_CRASHES = 5
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Предфоркающий WSGI-сервер: приложение загружается и прогревается '
+        'один раз в главном процессе, после gc.freeze() процесс форкается '
+        'на N воркеров, которые делят его память по copy-on-write.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bind', default='127.0.0.1:8000',
+            help='Адрес и порт для прослушивания.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число воркеров.',
+        )
+        parser.add_argument(
+            '--no-gc-freeze', action='store_false', dest='gc_freeze',
+            help='Не замораживать объекты перед форком (для сравнения).',
+        )
+        parser.add_argument(
+            '--quiet', action='store_true',
+            help='Не писать журнал запросов.',
+        )
+
+    def handle(self, *args, **options):
+        host, _, port = options['bind'].rpartition(':')
+        if not host or not port.isdigit():
+            raise CommandError('Адрес задаётся как host:port.')
+        handler = (
+            QuietWSGIRequestHandler if options['quiet']
+            else WSGIRequestHandler
+        )
+
+        from blogicum.wsgi import application
+        from blog.warmup import warm_up
+
+        if not settings.WARMUP_ON_STARTUP:
+            warm_up()
+        server = WSGIServer((host, int(port)), handler)
+        server.set_app(application)
+        # Соединения с БД не должны переживать форк: каждый воркер
+        # откроет своё.
+        connections.close_all()
+        if options['gc_freeze']:
+            gc.collect()
+            gc.freeze()
+
+        self.workers = set()
+        self.crashes = deque()
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write(
+            f'Слушаю {host}:{port}, воркеров: {options["workers"]}, '
+            f'мастер pid {os.getpid()}'
+        )
+        self.stdout.flush()
+        for _ in range(options['workers']):
+            self.spawn(server)
+        failed = self.supervise(server)
+        server.server_close()
+        if failed:
+            raise CommandError(
+                f'Воркеры упали больше {MAX_CRASHES} раз за '
+                f'{CRASH_WINDOW} с, сервер остановлен.'
+            )
+
+    def supervise(self, server):
+        """Перезапускает завершившиеся воркеры, пока сервер не
+        остановлен; возвращает True, если воркеры падали слишком часто.
+        """
+        failed = False
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.workers.discard(pid)
+            if self.stopping.is_set():
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                # Воркер остановили снаружи, это не падение.
+                self.spawn(server)
+                continue
+            delay = self.crashed()
+            if delay is None:
+                failed = True
+                self.stop(signal.SIGTERM, None)
+                continue
+            self.stderr.write(
+                f'Воркер {pid} завершился с кодом {code}, перезапуск '
+                f'через {delay:g} с.'
+            )
+            # Ждём на событии, а не в sleep: сигнал остановки прервёт паузу.
+            if not self.stopping.wait(delay):
+                self.spawn(server)
+        return failed
+
+    def crashed(self):
+        """Учитывает падение воркера; возвращает паузу перед перезапуском
+        или None, если падения слишком частые.
+        """
+        now = time.monotonic()
+        self.crashes.append(now)
+        while now - self.crashes[0] > CRASH_WINDOW:
+            self.crashes.popleft()
+        if len(self.crashes) > MAX_CRASHES:
+            return None
+        return min(
+            RESPAWN_DELAY * 2 ** (len(self.crashes) - 1), RESPAWN_DELAY_MAX
+        )
+
+    def spawn(self, server):
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+        # Выходим через SystemExit, чтобы воркер успел сбросить буферы.
+        signal.signal(signal.SIGINT, lambda *args: sys.exit(0))
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        code = 0
+        try:
+            server.serve_forever()
+        except SystemExit as error:
+            code = error.code if isinstance(error.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        try:
+            worker_stopping.send(sender=self.__class__)
+        except Exception:
+            traceback.print_exc()
+            code = code or 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+    def stop(self, signum, frame):
+        self.stopping.set()
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        if signum == signal.SIGINT:
+            sys.stdout.write('\n')
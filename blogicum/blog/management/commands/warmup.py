@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны, строит таблицы URL и импортирует '
+        'модули из WARMUP_MODULES. Завершается ошибкой, если какой-то '
+        'шаблон не компилируется, поэтому годится как проверка при деплое.'
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stats = warm_up()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f'Шаблонов: {stats["templates"]}, '
+            f'резолверов: {stats["resolvers"]}, '
+            f'модулей: {stats["modules"]}, '
+            f'за {elapsed:.0f} мс'
+        )
+        if stats['errors']:
+            raise CommandError('\n'.join(
+                f'{name}: {error}' for name, error in stats['errors']
+            ))
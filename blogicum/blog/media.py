@@ -0,0 +1,136 @@
+"""Раздача загруженных изображений постов.
+
+Доступ проверяется по посту, к которому относится файл. Сами байты
+отдаёт фронтовой сервер через X-Accel-Redirect (nginx) или X-Sendfile
+(Apache, lighttpd), если он указан в MEDIA_SENDFILE_BACKEND; иначе файл
+отдаётся Django с поддержкой запросов Range.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from blog.models import Post
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """Разбирает одиночный диапазон Range в пару (начало, конец).
+
+    Возвращает None, если заголовок не поддерживается (несколько
+    диапазонов, другие единицы) — тогда отдаётся весь файл. Для
+    невыполнимого диапазона бросает ValueError.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def sendfile_response(path, fullpath):
+    """Пустой ответ, тело которого подставит фронтовой сервер."""
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE_BACKEND == 'nginx':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+        )
+    else:
+        response['X-Sendfile'] = fullpath
+    # Тип и длину выставит фронтовой сервер по самому файлу.
+    del response['Content-Type']
+    return response
+
+
+def file_response(request, fullpath, stat):
+    """Ответ с содержимым файла; учитывает Range и If-Range."""
+    size = stat.st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (
+        if_range is None
+        or parse_http_date_safe(if_range) == int(stat.st_mtime)
+    ):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if byte_range is None:
+        response = FileResponse(open(fullpath, 'rb'))
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(fullpath, start, end), status=206
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve(request, path):
+    """Отдаёт изображение поста, видимого текущему пользователю."""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except ValueError:
+        raise Http404
+    if not Post.objects.visible_to(request.user).filter(image=path).exists():
+        raise Http404
+    try:
+        stat = os.stat(fullpath)
+    except FileNotFoundError:
+        raise Http404
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime, stat.st_size
+    ):
+        return HttpResponseNotModified()
+    if settings.MEDIA_SENDFILE_BACKEND:
+        response = sendfile_response(path, fullpath)
+    else:
+        response = file_response(request, fullpath, stat)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_cache_control(
+        response, private=True, max_age=settings.MEDIA_MAX_AGE
+    )
+    return response
@@ -0,0 +1,157 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import cc_delim_re, patch_cache_control
+
+from blog.edge import enter_shell, is_edge_request, is_shell
+from blog.ratelimit import client_ip, get_rate_limiter
+
+SESSION_REFRESHED_KEY = '_refreshed_at'
+
+
+class SessionRefreshMiddleware:
+    """Скользящее продление сессии без записи на каждый запрос.
+
+    Вместо SESSION_SAVE_EVERY_REQUEST сессия помечается изменённой не чаще
+    раза в SESSION_REFRESH_INTERVAL секунд; остальные запросы только читают
+    её из кеша. Подключается после SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is None or not session.session_key or session.modified:
+            return response
+        now = int(time.time())
+        refreshed_at = session.get(SESSION_REFRESHED_KEY, 0)
+        if now - refreshed_at >= settings.SESSION_REFRESH_INTERVAL:
+            session[SESSION_REFRESHED_KEY] = now
+        return response
+
+
+class RateLimitMiddleware:
+    """Ограничение частоты и сброс нагрузки на пишущих маршрутах.
+
+    Маршруты из RATE_LIMITS (имя URL -> (limit, period)) получают 429 при
+    исчерпании лимита клиента и 503, когда воркер перегружен: запросов в
+    обработке больше LOAD_SHED_MAX_IN_FLIGHT или скользящее среднее
+    времени ответа выше LOAD_SHED_MAX_LATENCY секунд. Отказ выдаётся в
+    process_view, до кода представления. Подключается после
+    AuthenticationMiddleware: клиент определяется по пользователю, а для
+    анонимов — по IP (см. client_ip).
+    """
+
+    # Вес нового замера в скользящем среднем времени ответа.
+    latency_weight = 0.1
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = 0.0
+
+    def __call__(self, request):
+        with self.lock:
+            self.in_flight += 1
+        started = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            elapsed = time.monotonic() - started
+            with self.lock:
+                self.in_flight -= 1
+                self.latency += self.latency_weight * (elapsed - self.latency)
+
+    def overloaded(self):
+        max_in_flight = settings.LOAD_SHED_MAX_IN_FLIGHT
+        max_latency = settings.LOAD_SHED_MAX_LATENCY
+        return (
+            max_in_flight is not None and self.in_flight > max_in_flight
+            or max_latency is not None and self.latency > max_latency
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        rule = settings.RATE_LIMITS.get(name)
+        if rule is None or request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        if self.overloaded():
+            return refusal(503, settings.LOAD_SHED_RETRY_AFTER)
+        if request.user.is_authenticated:
+            client = f'user:{request.user.pk}'
+        else:
+            client = f'ip:{client_ip(request)}'
+        limit, period = rule
+        retry_after = get_rate_limiter().consume(
+            f'{name}:{client}', limit, period
+        )
+        if retry_after:
+            return refusal(429, retry_after)
+        return None
+
+
+def refusal(status, retry_after):
+    """Короткий ответ без шаблонов и обращений к БД."""
+    response = HttpResponse(
+        'Слишком много запросов.' if status == 429 else 'Сервер перегружен.',
+        status=status,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+class EdgeCacheMiddleware:
+    """Общий для всех каркас страниц для прокси с ESI (см. blog.edge).
+
+    Для страниц из EDGE_CACHE_VIEWS подменяет посетителя анонимом и
+    помечает ответ как публично кэшируемый; прочие ответы прокси получает
+    с Cache-Control: private. Подключается перед SessionMiddleware, чтобы
+    править заголовки после неё.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_edge_request(request):
+            return response
+        # С куками ответ кэшировать нельзя: например, продлённая сессия
+        # досталась бы всем.
+        if (
+            is_shell(request)
+            and response.status_code == 200
+            and not response.cookies
+        ):
+            patch_cache_control(
+                response, public=True, max_age=settings.EDGE_CACHE_MAX_AGE
+            )
+            response['Surrogate-Control'] = 'content="ESI/1.0"'
+            # Каркас собран для анонима и от кук не зависит.
+            if response.has_header('Vary'):
+                vary = [
+                    header for header in cc_delim_re.split(response['Vary'])
+                    if header.lower() != 'cookie'
+                ]
+                if vary:
+                    response['Vary'] = ', '.join(vary)
+                else:
+                    del response['Vary']
+        elif not response.has_header('Cache-Control'):
+            patch_cache_control(response, private=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and is_edge_request(request)
+            and request.resolver_match.view_name in settings.EDGE_CACHE_VIEWS
+        ):
+            enter_shell(request)
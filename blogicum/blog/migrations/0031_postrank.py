@@ -0,0 +1,86 @@
+# Generated by Django 3.2.16 on 2026-10-19 19:51
+
+import datetime as dt
+import math
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия формулы и весов из blog.trending на момент миграции: рейтинг
+# считается так же, даже если код и настройки потом изменятся.
+EPOCH = dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc)
+TAU = dt.timedelta(hours=24).total_seconds() / math.log(2)
+POST_WEIGHT = 1
+COMMENT_WEIGHT = 5
+VIEW_WEIGHT = 0.2
+
+
+def event_score(weight, moment):
+    return math.log(weight) + (moment - EPOCH).total_seconds() / TAU
+
+
+def combine(score, weight, moment):
+    delta = event_score(weight, moment)
+    high, low = max(score, delta), min(score, delta)
+    return high + math.log1p(math.exp(low - high))
+
+
+def build_ranks(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    PostRank = apps.get_model('blog', 'PostRank')
+    comments = {}
+    for post_id, created_at in Comment.objects.values_list(
+        'post_id', 'created_at'
+    ).iterator():
+        comments.setdefault(post_id, []).append(created_at)
+    ranks = []
+    for post in Post.objects.select_related('category').iterator():
+        score = event_score(POST_WEIGHT, post.pub_date)
+        for created_at in comments.get(post.pk, ()):
+            score = combine(score, COMMENT_WEIGHT, created_at)
+        if post.views:
+            score = combine(
+                score, VIEW_WEIGHT * post.views, post.pub_date
+            )
+        ranks.append(PostRank(
+            post=post,
+            score=score,
+            comment_count=len(comments.get(post.pk, ())),
+            is_listed=bool(
+                post.is_published
+                and post.category_id
+                and post.category.is_published
+            ),
+            pub_date=post.pub_date,
+        ))
+    PostRank.objects.bulk_create(ranks, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0030_post_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRank',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rank', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментарии')),
+                ('is_listed', models.BooleanField(default=False, verbose_name='Показывать в популярном')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+            ],
+            options={
+                'verbose_name': 'рейтинг публикации',
+                'verbose_name_plural': 'Рейтинги публикаций',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postrank',
+            index=models.Index(fields=['is_listed', '-score'], name='postrank_listed_score_idx'),
+        ),
+        migrations.RunPython(build_ranks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 3.2.16 on 2026-10-19 19:53
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def collect(posts, comments, post_key, comment_key):
+    """Копия blog.stats.collect на момент миграции."""
+    rows = defaultdict(lambda: {
+        'post_count': 0, 'comment_count': 0, 'last_post_date': None,
+    })
+    for row in posts.filter(
+        is_published=True, pub_date__lte=timezone.now(),
+        **{f'{post_key}__isnull': False}
+    ).values(post_key).annotate(n=Count('id'), last=Max('pub_date')):
+        rows[row[post_key]].update(
+            post_count=row['n'], last_post_date=row['last']
+        )
+    for row in comments.filter(
+        **{f'{comment_key}__isnull': False}
+    ).values(comment_key).annotate(n=Count('id')):
+        rows[row[comment_key]]['comment_count'] = row['n']
+    return rows
+
+
+def build_stats(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    for name, key, post_key, comment_key in (
+        ('AuthorStats', 'user_id', 'author_id', 'author_id'),
+        ('CategoryStats', 'category_id', 'category_id', 'post__category_id'),
+    ):
+        model = apps.get_model('blog', name)
+        rows = collect(Post.objects, Comment.objects, post_key, comment_key)
+        model.objects.bulk_create(
+            model(**{key: pk}, **values) for pk, values in rows.items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0031_postrank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Последняя публикация')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auth.user', verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Последняя публикация')),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'статистика категории',
+                'verbose_name_plural': 'Статистика категорий',
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
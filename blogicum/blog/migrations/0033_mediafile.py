@@ -0,0 +1,40 @@
+# Generated by Django 3.2.16 on 2026-10-19 20:02
+
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    MediaFile = apps.get_model('blog', 'MediaFile')
+    counts = {}
+    for name in Post.objects.exclude(image='').values_list(
+        'image', flat=True
+    ).iterator():
+        counts[name] = counts.get(name, 0) + 1
+    MediaFile.objects.bulk_create(
+        MediaFile(name=name, ref_count=count)
+        for name, count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0032_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Путь')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+            options={
+                'verbose_name': 'файл',
+                'verbose_name_plural': 'Файлы',
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-19 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0033_mediafile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('target', models.CharField(choices=[('post', 'Публикация'), ('user', 'Пользователь')], max_length=16, verbose_name='Что удалить')),
+                ('object_id', models.BigIntegerField(verbose_name='Идентификатор')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'задача удаления',
+                'verbose_name_plural': 'Очередь удаления',
+            },
+        ),
+    ]
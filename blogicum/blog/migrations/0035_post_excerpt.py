@@ -0,0 +1,52 @@
+# Generated by Django 3.2.16 on 2026-10-19 20:05
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+# Копия render_excerpt и render_html из blog.models на момент миграции.
+EXCERPT_WORDS = 10
+EXCERPT_MAX_LENGTH = 512
+
+
+def render_excerpt(text):
+    return Truncator(text).words(
+        EXCERPT_WORDS, truncate=' …'
+    )[:EXCERPT_MAX_LENGTH]
+
+
+def render_html(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def render_texts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = []
+    for post in Post.objects.only('id', 'text').iterator():
+        post.excerpt = render_excerpt(post.text)
+        post.text_html = render_html(post.text)
+        posts.append(post)
+    Post.objects.bulk_update(
+        posts, ('excerpt', 'text_html'), batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0034_deletionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=512, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст (HTML)'),
+        ),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
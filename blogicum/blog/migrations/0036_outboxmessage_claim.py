@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-19 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0035_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Взято на отправку в'),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claimed_by',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Взято на отправку'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+"""Кэш промахов для страниц категорий и профилей.
+
+Несуществующие slug и имена пользователей запоминаются на
+NEGATIVE_CACHE_TIMEOUT секунд, и повторный запрос получает 404 без
+обращения к БД. Запись сбрасывается при сохранении категории или
+пользователя с тем же ключом.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models.signals import post_save
+from django.http import Http404
+
+from blog.models import Category
+
+
+def missing_key(namespace, value):
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return f'missing:{namespace}:{digest}'
+
+
+def get_object_or_404_cached(queryset, namespace, field, value):
+    """Как get_object_or_404(queryset, **{field: value}), но с кэшем
+    промахов по ключу (namespace, value).
+    """
+    cache = caches[settings.NOT_FOUND_CACHE]
+    key = missing_key(namespace, value)
+    if cache.get(key):
+        raise Http404
+    try:
+        return queryset.get(**{field: value})
+    except queryset.model.DoesNotExist:
+        cache.set(key, True, settings.NEGATIVE_CACHE_TIMEOUT)
+        raise Http404
+
+
+def forget_miss(namespace, value):
+    caches[settings.NOT_FOUND_CACHE].delete(missing_key(namespace, value))
+
+
+def category_saved(sender, instance, raw=False, **kwargs):
+    # Промах мог быть и по снятой с публикации категории.
+    forget_miss('category', instance.slug)
+
+
+def user_saved(sender, instance, raw=False, **kwargs):
+    forget_miss('user', instance.username)
+
+
+post_save.connect(category_saved, sender=Category)
+post_save.connect(user_saved, sender=User)
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.template.defaultfilters import linebreaksbr
 from django.utils import timezone
+from django.utils.text import Truncator
 
 User = get_user_model()
 
@@ -66,6 +68,42 @@ class Location(IsPublished, CreatedAt):
         return self.name
 
 
+# Столько слов текста попадает в анонс на карточке поста.
+EXCERPT_WORDS = 10
+EXCERPT_MAX_LENGTH = 512
+
+
+def render_excerpt(text):
+    """Анонс: как {{ text|truncatewords:10 }}."""
+    return Truncator(text).words(
+        EXCERPT_WORDS, truncate=' …'
+    )[:EXCERPT_MAX_LENGTH]
+
+
+def render_html(text):
+    """HTML текста: как {{ text|linebreaksbr }}."""
+    return linebreaksbr(text, autoescape=True)
+
+
+class PostQuerySet(models.QuerySet):
+    """Выборки постов, общие для страниц и API."""
+
+    def published(self):
+        """Опубликованные посты опубликованных категорий, не из будущего."""
+        return self.filter(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__is_published=True,
+        )
+
+    def visible_to(self, user):
+        """Посты, которые пользователь может открыть: опубликованные и свои."""
+        condition = models.Q(is_published=True)
+        if user.is_authenticated:
+            condition |= models.Q(author=user)
+        return self.filter(condition)
+
+
 class Post(IsPublished, CreatedAt):
     """Основной класс постов и вся информацию о них."""
     title = models.CharField('Заголовок', max_length=256)
@@ -101,6 +139,15 @@ class Post(IsPublished, CreatedAt):
         null=True,
         verbose_name='Категория'
     )
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False
+    )
+    excerpt = models.CharField(
+        'Анонс', max_length=EXCERPT_MAX_LENGTH, blank=True, editable=False
+    )
+    text_html = models.TextField('Текст (HTML)', blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
@@ -109,6 +156,44 @@ class Post(IsPublished, CreatedAt):
     def __str__(self):
         return self.title
 
+    def render_text(self):
+        """Пересчитывает анонс и HTML текста для шаблонов."""
+        self.excerpt = render_excerpt(self.text)
+        self.text_html = render_html(self.text)
+
+    def save(self, *args, **kwargs):
+        deferred = self.get_deferred_fields()
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            # Просмотры пишет только сброс счётчика: обычное сохранение
+            # вернуло бы в БД число, прочитанное при загрузке поста.
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname != 'views'
+                and field.attname not in deferred
+            ]
+        if 'text' not in deferred:
+            self.render_text()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'text' in update_fields:
+                kwargs['update_fields'] = {
+                    *update_fields, 'excerpt', 'text_html'
+                }
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Имя файла на момент загрузки: по нему счётчик ссылок на файлы
+        # узнаёт о замене изображения.
+        if 'image' in field_names:
+            post._loaded_image = post.image.name or ''
+        return post
+
 
 class Comment(CreatedAt):
     """Класс комментариев."""
@@ -132,3 +217,169 @@ class Comment(CreatedAt):
 
     def __str__(self):
         return self.text[:30]
+
+
+class OutboxMessage(CreatedAt):
+    """Письмо в очереди на отправку."""
+
+    QUEUED = 'queued'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не доставлено'),
+    )
+
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.JSONField('Получатели')
+    subject = models.CharField('Тема', max_length=998, blank=True)
+    message = models.BinaryField('Письмо (MIME)')
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    claimed_by = models.CharField(
+        'Взято на отправку', max_length=32, blank=True, editable=False
+    )
+    claimed_at = models.DateTimeField(
+        'Взято на отправку в', null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_status_next_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.subject or f'Письмо #{self.pk}'
+
+
+class PostRank(models.Model):
+    """Рейтинг поста для ленты популярного.
+
+    score — натуральный логарифм суммы весов событий (просмотров,
+    комментариев), каждое из которых умножено на e^(t / τ). Множитель
+    общего затухания одинаков для всех постов, поэтому порядок по score
+    совпадает с порядком по затухающему рейтингу в любой момент.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rank',
+        verbose_name='Публикация',
+    )
+    score = models.FloatField('Рейтинг', default=0)
+    comment_count = models.PositiveIntegerField('Комментарии', default=0)
+    is_listed = models.BooleanField('Показывать в популярном', default=False)
+    pub_date = models.DateTimeField('Дата и время публикации')
+
+    class Meta:
+        verbose_name = 'рейтинг публикации'
+        verbose_name_plural = 'Рейтинги публикаций'
+        indexes = (
+            models.Index(
+                fields=('is_listed', '-score'),
+                name='postrank_listed_score_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.2f}'
+
+
+class Stats(models.Model):
+    """Абстрактная модель счётчиков для страниц автора и категории."""
+    post_count = models.PositiveIntegerField('Публикаций', default=0)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0)
+    last_post_date = models.DateTimeField(
+        'Последняя публикация', null=True, blank=True
+    )
+
+    class Meta:
+        abstract = True
+
+
+class AuthorStats(Stats):
+    """Счётчики пользователя: его публикации и комментарии."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class CategoryStats(Stats):
+    """Счётчики категории: публикации в ней и комментарии к ним."""
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Категория',
+    )
+
+    class Meta:
+        verbose_name = 'статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+    def __str__(self):
+        return str(self.category_id)
+
+
+class MediaFile(CreatedAt):
+    """Загруженный файл и число постов, которые на него ссылаются."""
+    name = models.CharField('Путь', max_length=255, primary_key=True)
+    ref_count = models.PositiveIntegerField('Ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
+
+
+class DeletionJob(CreatedAt):
+    """Отложенное удаление поста или пользователя с большим числом
+    комментариев; выполняется manage.py process_deletions.
+    """
+
+    POST = 'post'
+    USER = 'user'
+    TARGETS = (
+        (POST, 'Публикация'),
+        (USER, 'Пользователь'),
+    )
+
+    target = models.CharField('Что удалить', max_length=16, choices=TARGETS)
+    object_id = models.BigIntegerField('Идентификатор')
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'задача удаления'
+        verbose_name_plural = 'Очередь удаления'
+
+    def __str__(self):
+        return f'{self.get_target_display()} #{self.object_id}'
@@ -0,0 +1,176 @@
+import base64
+import binascii
+import datetime as dt
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    """Курсор пагинации не удалось разобрать."""
+
+
+def encode_cursor(moment, pk):
+    """Упаковывает ключ последней записи страницы в непрозрачный курсор."""
+    raw = f'{moment.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор в пару (дата, pk)."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        moment, pk = raw.rsplit('|', 1)
+        return dt.datetime.fromisoformat(moment), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidCursor(cursor) from error
+
+
+def keyset_filter(field, cursor, descending=False):
+    """Условие «строго после курсора» для сортировки по (field, id)."""
+    moment, pk = decode_cursor(cursor)
+    lookup = 'lt' if descending else 'gt'
+    return (
+        Q(**{f'{field}__{lookup}': moment})
+        | Q(**{field: moment, f'id__{lookup}': pk})
+    )
+
+
+def keyset_page(queryset, field, cursor=None, limit=10, descending=False):
+    """Возвращает срез из limit записей после курсора и курсор следующего.
+
+    queryset должен отдавать словари (values()) либо объекты модели,
+    у которых есть атрибуты field и id.
+    """
+    prefix = '-' if descending else ''
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+    if cursor:
+        queryset = queryset.filter(keyset_filter(field, cursor, descending))
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, field), last.id)
+    return rows, next_cursor
+
+
+def count_cache():
+    return caches[settings.PAGINATOR_CACHE]
+
+
+def version_key(namespace):
+    return f'paginator-version:{namespace}'
+
+
+def count_version(namespace):
+    """Текущая версия счётчиков пространства namespace.
+
+    Начальная версия берётся от времени, чтобы после вытеснения ключа
+    из кэша не воскресли старые счётчики.
+    """
+    cache = count_cache()
+    cache.add(version_key(namespace), time.time_ns(), timeout=None)
+    return cache.get(version_key(namespace))
+
+
+def invalidate_counts(*namespaces):
+    """Сбрасывает закэшированные счётчики пространств namespaces."""
+    cache = count_cache()
+    for namespace in namespaces:
+        try:
+            cache.incr(version_key(namespace))
+        except ValueError:
+            cache.set(version_key(namespace), time.time_ns(), timeout=None)
+
+
+class LazyPage(Page):
+    """Страница, которая знает про следующую без общего числа записей."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который не считает записи без необходимости.
+
+    Страница выбирается запросом на per_page + 1 строк: по лишней строке
+    видно, есть ли следующая, так что COUNT(*) нужен только для номеров
+    страниц. Сам счётчик кэшируется по ключу (view, namespace) и
+    сбрасывается сменой версии namespace (см. invalidate_counts). Если
+    estimate() оценивает набор не меньше чем в PAGINATOR_APPROXIMATE_COUNT
+    записей, точный подсчёт не выполняется вовсе. Срез страницы не
+    ограничивается счётчиком, поэтому устаревший счётчик искажает только
+    номера страниц, но не прячет записи.
+    """
+
+    def __init__(self, object_list, per_page, view, namespace,
+                 estimate=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.view = view
+        self.namespace = namespace
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        cache = count_cache()
+        key = (
+            f'paginator-count:{self.view}:{self.namespace}:'
+            f'{count_version(self.namespace)}'
+        )
+        count = cache.get(key)
+        if count is None:
+            count = self.estimate() if self.estimate else None
+            if count is None or count < settings.PAGINATOR_APPROXIMATE_COUNT:
+                count = super().count
+            cache.set(key, count, settings.PAGINATOR_COUNT_TIMEOUT)
+        return count
+
+    def validate_number(self, number):
+        # Верхнюю границу не проверяем: это потребовало бы подсчёта.
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def get_page(self, number):
+        """Как Paginator.get_page, но за концом набора отдаёт последнюю
+        страницу, где есть записи: счётчик может быть устаревшим.
+        """
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            pass
+        try:
+            return self.page(self.num_pages)
+        except EmptyPage:
+            return self.page(1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов')
+        return LazyPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
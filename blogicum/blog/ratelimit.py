@@ -0,0 +1,102 @@
+"""Ограничение частоты запросов по алгоритму token bucket.
+
+У каждого клиента на каждом ограниченном маршруте есть корзина на
+limit жетонов, которая наполняется со скоростью limit / period в
+секунду; запрос забирает один жетон. Настройки маршрутов лежат в
+RATE_LIMITS, хранилище корзин выбирается RATE_LIMIT_BACKEND.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+def refill(tokens, updated_at, now, limit, period):
+    """Число жетонов в корзине к моменту now."""
+    return min(limit, tokens + (now - updated_at) * limit / period)
+
+
+def take(tokens, limit, period):
+    """Пытается взять жетон: (остаток, через сколько секунд повторить).
+
+    Время ожидания равно нулю, если жетон взят.
+    """
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) * period / limit
+
+
+def client_ip(request):
+    """IP клиента с учётом RATE_LIMIT_TRUSTED_PROXIES прокси перед сайтом.
+
+    Каждый прокси дописывает в X-Forwarded-For адрес, с которого к нему
+    пришли, поэтому клиентом считается адрес, записанный самым дальним из
+    наших прокси; всё левее него клиент мог подделать.
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if not hops or not forwarded:
+        return request.META.get('REMOTE_ADDR')
+    addresses = [
+        address.strip() for address in forwarded.split(',') if address.strip()
+    ]
+    return addresses[-min(hops, len(addresses))]
+
+
+class LocalRateLimiter:
+    """Корзины в памяти процесса: лимит действует на каждый воркер.
+
+    Корзины хранятся в порядке последнего обращения; сверх max_buckets
+    выбрасывается самая давняя, так что память ограничена, а вытеснение
+    стоит O(1).
+    """
+
+    max_buckets = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def consume(self, key, limit, period):
+        """Возвращает 0, если запрос разрешён, иначе секунды до повтора."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated_at = self.buckets.pop(key, (limit, now))
+            tokens, retry_after = take(
+                refill(tokens, updated_at, now, limit, period), limit, period
+            )
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        return retry_after
+
+
+class CacheRateLimiter:
+    """Корзины в общем кеше RATE_LIMIT_CACHE: лимит общий для воркеров.
+
+    Чтение и запись корзины не атомарны, так что при одновременных
+    запросах одного клиента лимит может быть немного превышен.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.RATE_LIMIT_CACHE]
+
+    def consume(self, key, limit, period):
+        now = time.time()
+        key = f'ratelimit:{key}'
+        tokens, updated_at = self.cache.get(key, (limit, now))
+        tokens, retry_after = take(
+            refill(tokens, updated_at, now, limit, period), limit, period
+        )
+        # Через period секунд корзина в любом случае полна.
+        self.cache.set(key, (tokens, now), timeout=period)
+        return retry_after
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    return import_string(settings.RATE_LIMIT_BACKEND)()
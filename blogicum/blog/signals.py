@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+# Отправляется после записи буфера просмотров в БД;
+# counts — словарь {post_id: прирост просмотров}.
+views_flushed = Signal()
+
+# Отправляется воркером `manage.py serve` перед завершением.
+worker_stopping = Signal()
@@ -0,0 +1,120 @@
+"""Статика с хешированными именами и заранее сжатыми вариантами.
+
+collectstatic кладёт рядом с каждым текстовым файлом .gz и, если
+установлен brotli, .br. Представление serve отдаёт подходящий вариант по
+Accept-Encoding; файлы с хешем в имени кешируются клиентом навсегда.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage)
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.json', '.txt')
+MIN_COMPRESS_SIZE = 256
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хеширует имена файлов и сохраняет gzip/brotli-варианты."""
+
+    def stored_name(self, name):
+        # Без collectstatic (разработка, тесты) отдаём исходное имя; в
+        # боевом режиме отсутствие файла в манифесте — ошибка сборки.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.STATIC_MANIFEST_STRICT:
+                raise
+            return name
+
+    def is_hashed(self, name):
+        """Есть ли name среди хешированных имён загруженного манифеста."""
+        if getattr(self, '_hashed_names_of', None) is not self.hashed_files:
+            self._hashed_names = set(self.hashed_files.values())
+            self._hashed_names_of = self.hashed_files
+        return name in self._hashed_names
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve(request, path):
+    """Отдаёт файл из STATIC_ROOT, по возможности заранее сжатый."""
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime, stat.st_size
+    ):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accepted = accepted_encodings(request)
+    filename, encoding = fullpath, None
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(fullpath + suffix):
+            filename, encoding = fullpath + suffix, coding
+            break
+    # Имя для Content-Disposition — исходное, а не сжатого варианта.
+    response = FileResponse(
+        open(filename, 'rb'), filename=os.path.basename(fullpath)
+    )
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if staticfiles_storage.is_hashed(path):
+        patch_cache_control(
+            response, public=True, immutable=True,
+            max_age=settings.STATIC_MAX_AGE,
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
@@ -0,0 +1,230 @@
+"""Счётчики для страниц автора и категории.
+
+Число опубликованных постов, комментариев и дата последней публикации
+хранятся в AuthorStats и CategoryStats и меняются приращениями по
+сигналам, так что страница читает их одной строкой по первичному ключу.
+Опубликованным считается пост с is_published и наступившей pub_date:
+отложенные посты появляются в счётчиках при следующей сверке
+(manage.py reconcile_stats), которую стоит запускать по расписанию. Те же
+события сбрасывают закэшированные счётчики пагинации.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from blog.models import AuthorStats, CategoryStats, Comment, Post
+from blog.pagination import invalidate_counts
+
+# Модель счётчиков: (поле поста, поле комментария) с её ключом.
+SOURCES = {
+    AuthorStats: ('author_id', 'author_id'),
+    CategoryStats: ('category_id', 'post__category_id'),
+}
+
+
+def published_q(moment=None):
+    return Q(is_published=True, pub_date__lte=moment or timezone.now())
+
+
+def is_counted(is_published, pub_date):
+    return bool(is_published and pub_date <= timezone.now())
+
+
+def collect(posts, comments, post_key, comment_key, moment=None):
+    """Считает счётчики с нуля: {ключ: {поле: значение}}.
+
+    posts и comments — менеджеры или querysets постов и комментариев.
+    """
+    rows = defaultdict(lambda: {
+        'post_count': 0, 'comment_count': 0, 'last_post_date': None,
+    })
+    for row in posts.filter(
+        published_q(moment), **{f'{post_key}__isnull': False}
+    ).values(post_key).annotate(n=Count('id'), last=Max('pub_date')):
+        rows[row[post_key]].update(
+            post_count=row['n'], last_post_date=row['last']
+        )
+    for row in comments.filter(
+        **{f'{comment_key}__isnull': False}
+    ).values(comment_key).annotate(n=Count('id')):
+        rows[row[comment_key]]['comment_count'] = row['n']
+    return rows
+
+
+def compute(model, keys):
+    post_key, comment_key = SOURCES[model]
+    return collect(
+        Post.objects.filter(**{f'{post_key}__in': keys}),
+        Comment.objects.filter(**{f'{comment_key}__in': keys}),
+        post_key,
+        comment_key,
+    )
+
+
+def reconcile(model):
+    """Пересчитывает все строки model с нуля; возвращает их число."""
+    post_key, comment_key = SOURCES[model]
+    rows = collect(Post.objects, Comment.objects, post_key, comment_key)
+    key = model._meta.pk.attname
+    with transaction.atomic():
+        model.objects.all().delete()
+        model.objects.bulk_create(
+            model(**{key: pk}, **values) for pk, values in rows.items()
+        )
+    return len(rows)
+
+
+def refresh(model, keys):
+    """Пересчитывает с нуля строки model с ключами keys."""
+    keys = [pk for pk in keys if pk is not None]
+    rows = compute(model, keys)
+    key = model._meta.pk.attname
+    with transaction.atomic():
+        model.objects.filter(pk__in=keys).delete()
+        model.objects.bulk_create(
+            model(**{key: pk}, **values) for pk, values in rows.items()
+        )
+
+
+def bump(model, pk, posts=0, comments=0, refresh_last=False):
+    """Прибавляет приращения к строке счётчиков pk.
+
+    Если строки ещё нет, она создаётся сразу пересчитанной.
+    """
+    if pk is None:
+        return
+    updates = {}
+    if posts:
+        updates['post_count'] = F('post_count') + posts
+    if comments:
+        updates['comment_count'] = F('comment_count') + comments
+    if refresh_last:
+        post_key, _ = SOURCES[model]
+        updates['last_post_date'] = Subquery(
+            Post.objects.filter(
+                published_q(), **{post_key: OuterRef('pk')}
+            ).order_by('-pub_date').values('pub_date')[:1]
+        )
+    if not updates:
+        return
+    if model.objects.filter(pk=pk).update(**updates):
+        return
+    if posts < 0 or comments < 0:
+        # Не заводим строку при удалении: её владелец может удаляться
+        # тем же каскадом. Недостачу поправит сверка.
+        return
+    model.objects.get_or_create(pk=pk, defaults=compute(model, [pk])[pk])
+
+
+def stats_for(model, obj):
+    """Счётчики объекта, загруженные через select_related('stats').
+
+    Для объекта без строки счётчиков возвращает несохранённые нули.
+    """
+    try:
+        return obj.stats
+    except ObjectDoesNotExist:
+        return model(pk=obj.pk)
+
+
+def post_state(post):
+    return {
+        'author_id': post.author_id,
+        'category_id': post.category_id,
+        'pub_date': post.pub_date,
+        'counted': is_counted(post.is_published, post.pub_date),
+    }
+
+
+def post_deltas(old, new):
+    """Приращения числа постов {(модель, ключ): delta} при переходе."""
+    deltas = defaultdict(int)
+    for state, sign in ((old, -1), (new, 1)):
+        if state and state['counted']:
+            for model, field in (
+                (AuthorStats, 'author_id'), (CategoryStats, 'category_id')
+            ):
+                deltas[model, state[field]] += sign
+    return deltas
+
+
+def post_presaved(sender, instance, raw=False, **kwargs):
+    instance._stats_state = None
+    if raw or instance.pk is None:
+        return
+    old = Post.objects.filter(pk=instance.pk).values(
+        'author_id', 'category_id', 'pub_date', 'is_published'
+    ).first()
+    if old is not None:
+        old['counted'] = is_counted(
+            old.pop('is_published'), old['pub_date']
+        )
+        instance._stats_state = old
+
+
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_stats_state', None)
+    new = post_state(instance)
+    deltas = post_deltas(old, new)
+    if old and old['category_id'] != new['category_id']:
+        moved = instance.comment.count()
+        if moved:
+            bump(CategoryStats, old['category_id'], comments=-moved)
+            bump(CategoryStats, new['category_id'], comments=moved)
+    namespaces = set()
+    if old is None or old['author_id'] != new['author_id']:
+        # В профиле видны все посты автора, не только опубликованные.
+        namespaces.add(f'author:{new["author_id"]}')
+        if old:
+            namespaces.add(f'author:{old["author_id"]}')
+    for (model, pk), delta in deltas.items():
+        changed = old is None or old['pub_date'] != new['pub_date']
+        if delta or changed:
+            bump(model, pk, posts=delta, refresh_last=True)
+            if model is CategoryStats and pk is not None:
+                namespaces.add(f'category:{pk}')
+    invalidate_counts(*namespaces)
+
+
+def post_deleted(sender, instance, **kwargs):
+    invalidate_counts(
+        f'author:{instance.author_id}', f'category:{instance.category_id}'
+    )
+    if is_counted(instance.is_published, instance.pub_date):
+        bump(AuthorStats, instance.author_id, posts=-1, refresh_last=True)
+        bump(
+            CategoryStats, instance.category_id, posts=-1, refresh_last=True
+        )
+
+
+def comment_changed(instance, delta):
+    bump(AuthorStats, instance.author_id, comments=delta)
+    if Comment._meta.get_field('post').is_cached(instance):
+        category_id = instance.post.category_id
+    else:
+        category_id = Post.objects.filter(
+            pk=instance.post_id
+        ).values_list('category_id', flat=True).first()
+    bump(CategoryStats, category_id, comments=delta)
+
+
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        comment_changed(instance, 1)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    comment_changed(instance, -1)
+
+
+pre_save.connect(post_presaved, sender=Post)
+post_save.connect(post_saved, sender=Post)
+post_delete.connect(post_deleted, sender=Post)
+post_save.connect(comment_saved, sender=Comment)
+post_delete.connect(comment_deleted, sender=Comment)
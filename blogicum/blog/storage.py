@@ -0,0 +1,126 @@
+"""Хранилище изображений по содержимому.
+
+Файл сохраняется под именем из SHA-256 своего содержимого
+(cas/ab/cd/<хеш>.<расширение>), поэтому одинаковые картинки разных
+постов лежат на диске один раз. Загрузка идёт по частям: временный файл
+загрузчика переносится на место без копирования, остальное пишется во
+временный файл порциями с одновременным подсчётом хеша.
+
+Число постов, ссылающихся на файл, хранится в MediaFile и меняется по
+сигналам. Файлы без ссылок удаляет manage.py gc_media после периода
+ожидания: сразу удалять нельзя, одновременная загрузка того же файла
+могла уже найти его на диске.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save
+
+from blog.models import MediaFile, Post
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_name(digest, name):
+    _, ext = os.path.splitext(name)
+    return f'cas/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save, а одинаковое содержимое
+        # и должно попадать в один файл.
+        return name
+
+    def _save(self, name, content):
+        if hasattr(content, 'temporary_file_path'):
+            path = content.temporary_file_path()
+            digest = hashlib.sha256()
+            with open(path, 'rb') as file:
+                for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            return self.store(path, content_name(digest.hexdigest(), name))
+        os.makedirs(self.location, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, path = tempfile.mkstemp(
+            prefix='.upload-', dir=self.location
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                    file.write(chunk)
+            return self.store(path, content_name(digest.hexdigest(), name))
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def store(self, path, name):
+        """Переносит готовый файл path на место name, если его там нет."""
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            # Отмечаем файл как свежий, чтобы gc_media его не тронул.
+            os.utime(full_path)
+            return name
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        file_move_safe(path, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+def add_reference(name, delta):
+    if not name:
+        return
+    files = MediaFile.objects.filter(name=name)
+    if delta < 0:
+        files = files.filter(ref_count__gte=-delta)
+    if not files.update(ref_count=F('ref_count') + delta) and delta > 0:
+        MediaFile.objects.get_or_create(
+            name=name, defaults={'ref_count': delta}
+        )
+
+
+def recount_references(names=None):
+    """Пересчитывает MediaFile по изображениям постов с нуля: все или
+    только файлы names.
+    """
+    posts = Post.objects.exclude(image='')
+    files = MediaFile.objects.all()
+    if names is not None:
+        posts = posts.filter(image__in=names)
+        files = files.filter(name__in=names)
+    counts = posts.order_by().values('image').annotate(n=Count('id'))
+    with transaction.atomic():
+        files.update(ref_count=0)
+        for row in counts.iterator():
+            MediaFile.objects.update_or_create(
+                name=row['image'], defaults={'ref_count': row['n']}
+            )
+
+
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = instance.image.name or ''
+    # Для поста, загруженного без поля image, прежнее имя неизвестно;
+    # лишние ссылки в этом случае подберёт gc_media.
+    old = '' if created else getattr(instance, '_loaded_image', None)
+    if old is not None and old != new:
+        add_reference(new, 1)
+        add_reference(old, -1)
+    instance._loaded_image = new
+
+
+def post_deleted(sender, instance, **kwargs):
+    add_reference(instance.image.name, -1)
+
+
+post_save.connect(post_saved, sender=Post)
+post_delete.connect(post_deleted, sender=Post)
@@ -0,0 +1,33 @@
+from urllib.parse import urlencode
+
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from blog.edge import is_shell
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def in_shell(context):
+    """Собирается ли общий для всех каркас страницы (см. blog.edge)."""
+    request = context.get('request')
+    return request is not None and is_shell(request)
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, name, **params):
+    """Часть страницы, зависящая от посетителя: includes/<name>.html.
+
+    В каркасе для прокси вместо неё выводится <esi:include>.
+    """
+    request = context.get('request')
+    if request is None or not is_shell(request):
+        return context.template.engine.get_template(
+            f'includes/{name}.html'
+        ).render(context)
+    url = reverse('blog:fragment', args=(name,))
+    if params:
+        url = f'{url}?{urlencode(params)}'
+    return format_html('<esi:include src="{}"/>', url)
@@ -0,0 +1,204 @@
+"""Инкрементальный рейтинг популярных постов.
+
+Каждое событие (публикация, комментарий, просмотр) добавляет к рейтингу
+поста вес w·e^((t - EPOCH) / τ), где τ = TRENDING_HALF_LIFE / ln 2. Храним
+логарифм суммы, чтобы числа не переполнялись. Рейтинг меняется только при
+событиях, а лента популярного — это чтение PostRank по индексу
+(is_listed, -score).
+"""
+import datetime as dt
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post, PostRank
+from blog.signals import views_flushed
+
+EPOCH = dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc)
+EMPTY_SCORE = -1e9
+
+
+def event_score(weight, moment):
+    """Логарифм вклада одного события с весом weight в момент moment."""
+    tau = settings.TRENDING_HALF_LIFE.total_seconds() / math.log(2)
+    return math.log(weight) + (moment - EPOCH).total_seconds() / tau
+
+
+def combine(score, weight, moment):
+    """Прибавляет (или вычитает при weight < 0) событие к рейтингу."""
+    delta = event_score(abs(weight), moment)
+    high, low = max(score, delta), min(score, delta)
+    if weight > 0:
+        return high + math.log1p(math.exp(low - high))
+    if delta >= score:
+        return EMPTY_SCORE
+    return score + math.log1p(-math.exp(delta - score))
+
+
+def is_listed(post):
+    return bool(
+        post.is_published
+        and post.category_id
+        and post.category.is_published
+    )
+
+
+def apply(post_id, weight, moment, comment_delta=0):
+    """Добавляет к рейтингу поста событие веса weight в момент moment."""
+    with transaction.atomic():
+        rank = PostRank.objects.select_for_update().filter(
+            post_id=post_id
+        ).first()
+        if rank is None:
+            return
+        rank.score = combine(rank.score, weight, moment)
+        rank.comment_count = max(rank.comment_count + comment_delta, 0)
+        rank.save(update_fields=('score', 'comment_count'))
+
+
+def apply_views(counts, moment=None):
+    """Учитывает приросты просмотров {post_id: n} одним проходом."""
+    moment = moment or timezone.now()
+    weight = settings.TRENDING_VIEW_WEIGHT
+    with transaction.atomic():
+        ranks = list(PostRank.objects.select_for_update().filter(
+            post_id__in=counts
+        ))
+        for rank in ranks:
+            rank.score = combine(
+                rank.score, weight * counts[rank.post_id], moment
+            )
+        PostRank.objects.bulk_update(ranks, ('score',))
+
+
+def remove_comments(events):
+    """Вычитает из рейтингов удалённые в обход сигналов комментарии.
+
+    events — пары (post_id, created_at).
+    """
+    by_post = {}
+    for post_id, created_at in events:
+        by_post.setdefault(post_id, []).append(created_at)
+    if not by_post:
+        return
+    weight = settings.TRENDING_COMMENT_WEIGHT
+    with transaction.atomic():
+        ranks = list(PostRank.objects.select_for_update().filter(
+            post_id__in=by_post
+        ))
+        for rank in ranks:
+            for created_at in by_post[rank.post_id]:
+                rank.score = combine(rank.score, -weight, created_at)
+            rank.comment_count = max(
+                rank.comment_count - len(by_post[rank.post_id]), 0
+            )
+        PostRank.objects.bulk_update(ranks, ('score', 'comment_count'))
+
+
+def build_rank(post, comments=(), views_moment=None):
+    """Считает рейтинг поста с нуля по его событиям."""
+    score = event_score(settings.TRENDING_POST_WEIGHT, post.pub_date)
+    for created_at in comments:
+        score = combine(score, settings.TRENDING_COMMENT_WEIGHT, created_at)
+    if post.views:
+        score = combine(
+            score,
+            settings.TRENDING_VIEW_WEIGHT * post.views,
+            views_moment or post.pub_date,
+        )
+    return PostRank(
+        post=post,
+        score=score,
+        comment_count=len(comments),
+        is_listed=is_listed(post),
+        pub_date=post.pub_date,
+    )
+
+
+def rebuild_ranks(posts):
+    """Пересчитывает с нуля рейтинги постов posts (с category)."""
+    comments = {post.pk: [] for post in posts}
+    for post_id, created_at in Comment.objects.filter(
+        post__in=posts
+    ).values_list('post_id', 'created_at'):
+        comments[post_id].append(created_at)
+    with transaction.atomic():
+        PostRank.objects.filter(post__in=posts).delete()
+        PostRank.objects.bulk_create(
+            build_rank(post, comments[post.pk]) for post in posts
+        )
+
+
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        PostRank.objects.create(
+            post=instance,
+            score=event_score(
+                settings.TRENDING_POST_WEIGHT, instance.pub_date
+            ),
+            is_listed=is_listed(instance),
+            pub_date=instance.pub_date,
+        )
+        return
+    with transaction.atomic():
+        rank = PostRank.objects.select_for_update().filter(
+            post=instance
+        ).first()
+        if rank is None:
+            return
+        if rank.pub_date != instance.pub_date:
+            # Вклад самой публикации переезжает на новую дату.
+            weight = settings.TRENDING_POST_WEIGHT
+            rank.score = combine(
+                combine(rank.score, weight, instance.pub_date),
+                -weight,
+                rank.pub_date,
+            )
+            rank.pub_date = instance.pub_date
+        rank.is_listed = is_listed(instance)
+        rank.save(update_fields=('score', 'is_listed', 'pub_date'))
+
+
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    ranks = PostRank.objects.filter(post__category=instance)
+    if instance.is_published:
+        ranks.filter(post__is_published=True).update(is_listed=True)
+    else:
+        ranks.update(is_listed=False)
+
+
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply(
+            instance.post_id,
+            settings.TRENDING_COMMENT_WEIGHT,
+            instance.created_at,
+            comment_delta=1,
+        )
+
+
+def comment_deleted(sender, instance, **kwargs):
+    apply(
+        instance.post_id,
+        -settings.TRENDING_COMMENT_WEIGHT,
+        instance.created_at,
+        comment_delta=-1,
+    )
+
+
+def views_saved(sender, counts, **kwargs):
+    apply_views(counts)
+
+
+post_save.connect(post_saved, sender=Post)
+post_save.connect(category_saved, sender=Category)
+post_save.connect(comment_saved, sender=Comment)
+post_delete.connect(comment_deleted, sender=Comment)
+views_flushed.connect(views_saved)
@@ -6,6 +6,7 @@ app_name = 'blog'
 
 urlpatterns = [
     path('', views.PostListView.as_view(), name='index'),
+    path('trending/', views.TrendingPostListView.as_view(), name='trending'),
     path('posts/<int:pk>/',
          views.PostDetailView.as_view(),
          name='post_detail'),
@@ -22,12 +23,16 @@ urlpatterns = [
          views.category_posts,
          name='category_posts'),
     path('posts/<int:pk>/comment/', views.add_comment, name='add_comment'),
+    path('posts/<int:pk>/comments/',
+         views.comments_page,
+         name='comments_page'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/',
          views.edit_comment,
          name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>',
          views.delete_comment,
          name='delete_comment'),
+    path('fragments/<slug:name>/', views.fragment, name='fragment'),
     path('profile/<username>/', views.profile_view, name='profile'),
     path('edit_profile/<slug:username>/',
          views.edit_profile,
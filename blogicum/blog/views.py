@@ -6,15 +6,30 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.contrib.auth.views import LoginView
 from django.core.paginator import Paginator
+from django.http import Http404, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse, reverse_lazy
-from django.db.models import Count, Q
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import never_cache
 from django.views.generic import (
     CreateView, DeleteView, DetailView, ListView, UpdateView
 )
 
-from blog.models import Post, Category, Comment
+from blog.counters import get_view_counter
+from blog.deletion import remove
+from blog.edge import is_edge_request, is_shell, leave_shell
+from blog.missing import get_object_or_404_cached
+from blog.models import AuthorStats, Post, Category, CategoryStats, Comment
 from blog.forms import PostForm, CommentForm, ProfileForm
+from blog.pagination import (
+    CachedCountPaginator, InvalidCursor, keyset_page
+)
+from blog.stats import stats_for
+
+# Карточкам постов хватает анонса, полный текст в списки не грузим.
+LISTING_DEFERRED = ('text', 'text_html')
 
 
 class ProfileLoginView(LoginView):
@@ -27,17 +42,61 @@ class ProfileLoginView(LoginView):
         return url
 
 
-def get_page_obj(posts, page_number):
-    """Получаем страницу с постами."""
-    paginator = Paginator(posts, settings.PAGINATE_BY)
+def is_fragment_request(request):
+    """Запрос от скрипта страницы, которому нужен фрагмент, а не редирект."""
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def get_visible_post(user, pk):
+    """Пост, доступный пользователю: опубликованный или его собственный."""
+    return get_object_or_404(Post.objects.visible_to(user), pk=pk)
+
+
+def get_comments_page(post, cursor=None):
+    """Страница комментариев поста и курсор следующей."""
+    return keyset_page(
+        post.comment.select_related('author'),
+        'created_at',
+        cursor=cursor,
+        limit=settings.COMMENTS_PAGINATE_BY,
+    )
+
+
+def get_page_obj(posts, page_number, view=None, namespace=None,
+                 estimate=None):
+    """Получаем страницу с постами.
+
+    С namespace счётчик записей кэшируется (см. CachedCountPaginator).
+    """
+    if namespace is None:
+        paginator = Paginator(posts, settings.PAGINATE_BY)
+    else:
+        paginator = CachedCountPaginator(
+            posts, settings.PAGINATE_BY, view, namespace, estimate
+        )
     get_page_obj = paginator.get_page(page_number)
     return get_page_obj
 
 
+def get_page_range(page_obj):
+    """Номера страниц для пагинатора: края и соседи текущей.
+
+    Пропуски между ними обозначены paginator.ELLIPSIS, так что длина
+    списка не зависит от числа страниц. Номерам нужно общее число
+    страниц, поэтому список считается только при выводе: если страница
+    одна, шаблон его не показывает и записи не подсчитываются.
+    """
+    return SimpleLazyObject(lambda: list(
+        page_obj.paginator.get_elided_page_range(page_obj.number)
+    ))
+
+
 @login_required
 def edit_profile(request, username):
     """Изменение профиля пользователя."""
-    user = get_object_or_404(User, username=username)
+    user = get_object_or_404_cached(
+        User.objects.all(), 'user', 'username', username
+    )
     if user.username != request.user.username:
         return redirect('login')
     form = ProfileForm(request.POST or None, instance=user)
@@ -49,25 +108,28 @@ def edit_profile(request, username):
 
 def profile_view(request, username):
     """Отображает профиль пользователя."""
-    profile_user = get_object_or_404(User, username=username)
+    profile_user = get_object_or_404_cached(
+        User.objects.select_related('stats'), 'user', 'username', username
+    )
     posts = Post.objects.filter(
         author=profile_user
     ).order_by(
         '-pub_date'
-    ).annotate(comment_count=Count('comment__post'))
+    ).defer(*LISTING_DEFERRED).annotate(comment_count=Count('comment__post'))
     can_edit_profile = request.user == profile_user
 
     page_number = request.GET.get('page')
-    page_obj = get_page_obj(posts, page_number)
-
-    post_images = [post.image for post in posts if post.image]
+    page_obj = get_page_obj(
+        posts, page_number, 'profile', f'author:{profile_user.pk}'
+    )
 
     context = {
         'profile': profile_user,
         'posts': posts,
         'can_edit_profile': can_edit_profile,
         'page_obj': page_obj,
-        'post_images': post_images,
+        'page_range': get_page_range(page_obj),
+        'stats': stats_for(AuthorStats, profile_user),
     }
     return render(request, 'blog/profile.html', context)
 
@@ -80,27 +142,61 @@ class PostListView(ListView):
         is_published=True,
         pub_date__lte=dt.datetime.now(),
         category__is_published=True
-    ).select_related('author').annotate(comment_count=Count('comment__post'))
+    ).select_related('author').defer(*LISTING_DEFERRED).annotate(
+        comment_count=Count('comment__post')
+    )
     ordering = '-pub_date'
     paginate_by = settings.PAGINATE_BY
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_range'] = get_page_range(context['page_obj'])
+        return context
+
+
+class TrendingPostListView(ListView):
+    """Популярные посты по затухающему рейтингу."""
+    template_name = 'blog/trending.html'
+
+    def get_queryset(self):
+        return Post.objects.filter(
+            rank__is_listed=True,
+            rank__pub_date__lte=timezone.now(),
+        ).select_related(
+            'author', 'category', 'location'
+        ).defer(*LISTING_DEFERRED).annotate(
+            comment_count=F('rank__comment_count')
+        ).order_by('-rank__score')[:settings.TRENDING_LIMIT]
+
 
 def category_posts(request, category_slug):
     """Функция отвечает за вывод категории поста."""
-    category = get_object_or_404(
-        Category,
-        slug=category_slug,
-        is_published=True,
+    category = get_object_or_404_cached(
+        Category.objects.filter(is_published=True).select_related('stats'),
+        'category',
+        'slug',
+        category_slug,
     )
     post_list = category.posts.filter(
         pub_date__lte=dt.datetime.now(),
         is_published=True,
-    )
+    ).defer(*LISTING_DEFERRED)
     page_number = request.GET.get('page')
-    page_obj = get_page_obj(post_list, page_number)
+    stats = stats_for(CategoryStats, category)
+    page_obj = get_page_obj(
+        post_list,
+        page_number,
+        'category_posts',
+        f'category:{category.pk}',
+        # Счётчик из статистики может отставать на отложенные посты,
+        # поэтому годится только как оценка для очень больших категорий.
+        lambda: stats.post_count,
+    )
     context = {
         'category': category,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'page_range': get_page_range(page_obj),
+        'stats': stats,
     }
     return render(request, 'blog/category.html', context)
 
@@ -150,6 +246,12 @@ class PostDeleteView(LoginRequiredMixin, UserIsAuthorMixin, DeleteView):
     success_url = reverse_lazy('blog:index')
     template_name = 'blog/create.html'
 
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        remove(self.object)
+        return redirect(success_url)
+
 
 class PostDetailView(DetailView):
     """Детализированное отображение поста."""
@@ -157,28 +259,104 @@ class PostDetailView(DetailView):
     template_name = 'blog/detail.html'
 
     def get_object(self):
-        queryset = Post.objects.filter(
-            Q(is_published=True) | Q(author=self.request.user)
-        )
-        return get_object_or_404(
-            queryset,
-            pk=self.kwargs.get('pk'),
-        )
+        try:
+            return get_visible_post(self.request.user, self.kwargs.get('pk'))
+        except Http404:
+            if not is_shell(self.request):
+                raise
+        # Свой неопубликованный пост автор видит и через прокси: такая
+        # страница собирается целиком и не кэшируется.
+        leave_shell(self.request)
+        return get_visible_post(self.request.user, self.kwargs.get('pk'))
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        # За прокси просмотр считает фрагмент post_actions.
+        if not is_shell(request):
+            get_view_counter().increment(self.object.pk)
+        return response
 
     def get_context_data(self, **kwargs):
         """Получение данных контекста."""
         context = super().get_context_data(**kwargs)
 
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comment.select_related(
-                'author'
-            )
+        context['comments'], context['next_cursor'] = get_comments_page(
+            self.object
         )
 
         return context
 
 
+def comments_page(request, pk):
+    """Фрагмент со следующей страницей комментариев поста."""
+    post = get_visible_post(request.user, pk)
+    try:
+        comments, next_cursor = get_comments_page(
+            post, request.GET.get('cursor')
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest()
+    context = {
+        'post': post,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
+def get_fragment_object(queryset, params, key, field='pk'):
+    try:
+        return get_object_or_404(queryset, **{field: params[key]})
+    except (KeyError, ValueError):
+        raise Http404
+
+
+def get_fragment_post(request, queryset=Post.objects):
+    """Пост фрагмента, если посетитель может его видеть."""
+    return get_fragment_object(
+        queryset.visible_to(request.user), request.GET, 'post'
+    )
+
+
+def post_actions_context(request):
+    post = get_fragment_post(request, Post.objects.select_related('author'))
+    # Каркас поста кэшируется на прокси, а этот фрагмент запрашивается
+    # при каждом показе страницы, поэтому просмотр считается здесь, но
+    # только в запросах от прокси, собирающего страницу.
+    if is_edge_request(request):
+        get_view_counter().increment(post.pk)
+    return {'post': post}
+
+
+# Фрагмент -> контекст шаблона includes/<фрагмент>.html для запроса.
+FRAGMENTS = {
+    # Ссылки автора у комментариев одним фрагментом на страницу: в
+    # каркасе они скрыты, а этот фрагмент показывает ссылки посетителя.
+    'user_nav': lambda request: {'reveal_author_links': True},
+    'post_actions': post_actions_context,
+    'new_comment': lambda request: {
+        'post': get_fragment_post(request),
+        'form': CommentForm(),
+    },
+    'profile_actions': lambda request: {
+        'profile': get_fragment_object(
+            User.objects.all(), request.GET, 'profile', 'username'
+        ),
+    },
+}
+
+
+@never_cache
+def fragment(request, name):
+    """Часть страницы для текущего посетителя (см. blog.edge)."""
+    if name not in FRAGMENTS:
+        raise Http404
+    return render(
+        request, f'includes/{name}.html', FRAGMENTS[name](request)
+    )
+
+
 @login_required
 def add_comment(request, pk):
     """Добавление комментария."""
@@ -189,6 +367,17 @@ def add_comment(request, pk):
         comment.author = request.user
         comment.post = post
         comment.save()
+        if is_fragment_request(request):
+            return render(
+                request, 'includes/comment.html', {'comment': comment}
+            )
+    elif is_fragment_request(request):
+        return render(
+            request,
+            'includes/comment_form.html',
+            {'form': form, 'post': post},
+            status=400,
+        )
     return redirect('blog:post_detail', pk=pk)
 
 
@@ -205,7 +394,16 @@ def edit_comment(request, comment_id, post_id):
     }
     if form.is_valid():
         form.save()
+        if is_fragment_request(request):
+            return render(request, 'includes/comment.html', context)
         return redirect('blog:post_detail', pk=post_id)
+    if is_fragment_request(request):
+        return render(
+            request,
+            'includes/comment_edit_form.html',
+            context,
+            status=400 if form.is_bound else 200,
+        )
     return render(request, 'blog/comment.html', context)
 
 
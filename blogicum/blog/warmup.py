@@ -0,0 +1,80 @@
+"""Прогрев процесса перед приёмом трафика.
+
+Компилирует все шаблоны в кеш cached.Loader, заполняет таблицы обратного
+разрешения URL и импортирует модули, которые иначе загрузились бы на первом
+запросе. Вызывается из wsgi.py/asgi.py при WARMUP_ON_STARTUP и командой
+``manage.py warmup``.
+"""
+import logging
+import os
+from importlib import import_module
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def iter_template_names(engine):
+    """Имена всех .html-шаблонов во всех каталогах загрузчиков движка."""
+    seen = set()
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, 'loaders', (loader,)):
+            for directory in inner.get_dirs():
+                for root, _, files in os.walk(directory):
+                    for filename in files:
+                        if not filename.endswith(('.html', '.txt')):
+                            continue
+                        name = os.path.relpath(
+                            os.path.join(root, filename), directory
+                        ).replace(os.sep, '/')
+                        if name not in seen:
+                            seen.add(name)
+                            yield name
+
+
+def compile_templates():
+    """Компилирует шаблоны; возвращает число успешных и список ошибок."""
+    engine = engines['django'].engine
+    compiled, errors = 0, []
+    for name in iter_template_names(engine):
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as error:
+            errors.append((name, error))
+        else:
+            compiled += 1
+    return compiled, errors
+
+
+def populate_resolvers(resolver=None):
+    """Строит reverse_dict корневого и всех вложенных резолверов."""
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    count = 1
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += populate_resolvers(pattern)
+    return count
+
+
+def import_modules():
+    for module in settings.WARMUP_MODULES:
+        import_module(module)
+    return len(settings.WARMUP_MODULES)
+
+
+def warm_up():
+    """Полный прогрев; возвращает словарь со статистикой."""
+    import_modules()
+    resolvers = populate_resolvers()
+    compiled, errors = compile_templates()
+    for name, error in errors:
+        logger.error('Шаблон %s не компилируется: %s', name, error)
+    return {
+        'modules': len(settings.WARMUP_MODULES),
+        'resolvers': resolvers,
+        'templates': compiled,
+        'errors': errors,
+    }
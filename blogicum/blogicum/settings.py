@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/3.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
+import datetime as dt
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,12 +40,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.EdgeCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'blog.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -53,14 +57,33 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
-MEDIA_URL = 'media/'
+MEDIA_URL = '/media/'
+
+DEFAULT_FILE_STORAGE = 'blog.storage.ContentAddressedStorage'
+
+# Файлы без ссылок моложе этого (в секундах) gc_media не трогает.
+MEDIA_GC_GRACE = 24 * 60 * 60
+
+# Загрузки крупнее этого пишутся во временный файл, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+MEDIA_SENDFILE_BACKEND = None
+
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+MEDIA_MAX_AGE = 60 * 60
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -73,6 +96,18 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+WARMUP_ON_STARTUP = not DEBUG
+
+WARMUP_MODULES = [
+    'blog.admin',
+    'blog.api',
+    'blog.forms',
+    'django.contrib.auth.views',
+    'django.contrib.auth.forms',
+    'django_bootstrap5.templatetags.django_bootstrap5',
+    'PIL.Image',
+]
+
 
 DATABASES = {
     'default': {
@@ -82,6 +117,55 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'sessions',
+    },
+}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+SESSION_SAVE_EVERY_REQUEST = False
+
+SESSION_REFRESH_INTERVAL = 60 * 60 * 24
+
+VIEW_COUNTER_BACKEND = 'blog.counters.LocalViewCounter'
+
+VIEW_COUNTER_CACHE = 'default'
+
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+
+VIEW_COUNTER_FLUSH_THRESHOLD = 100
+
+VIEW_COUNTER_FLUSH_IN_BACKGROUND = not DEBUG
+
+TRENDING_HALF_LIFE = dt.timedelta(hours=24)
+
+TRENDING_POST_WEIGHT = 1
+
+TRENDING_COMMENT_WEIGHT = 5
+
+TRENDING_VIEW_WEIGHT = 0.2
+
+TRENDING_LIMIT = 20
+
+
+PASSWORD_HASHERS = [
+    'blog.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Стоимость хеширования паролей: больше — дороже подбор, но и каждый вход.
+PASSWORD_HASH_ITERATIONS = 260000
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -117,13 +201,29 @@ INTERNAL_IPS = [
 
 STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
-    "/var/www/static/",
 ]
 
+STATIC_ROOT = BASE_DIR / 'static'
+
+STATICFILES_STORAGE = 'blog.staticfiles.CompressedManifestStaticFilesStorage'
+
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
+# Падать на файлах, которых нет в манифесте collectstatic.
+STATIC_MANIFEST_STRICT = not DEBUG
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'blog.mail.OutboxEmailBackend'
+
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+OUTBOX_MAX_ATTEMPTS = 5
+
+OUTBOX_RETRY_DELAY = 60
+
+OUTBOX_CLAIM_TIMEOUT = 60 * 10
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
@@ -134,3 +234,55 @@ LOGIN_URL = '/auth/login'
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
 PAGINATE_BY = 10
+
+COMMENTS_PAGINATE_BY = 50
+
+API_MAX_PAGE_SIZE = 100
+
+PAGINATOR_CACHE = 'default'
+
+PAGINATOR_COUNT_TIMEOUT = 300
+
+PAGINATOR_APPROXIMATE_COUNT = 10000
+
+NOT_FOUND_CACHE = 'default'
+
+NOT_FOUND_CACHE_TIMEOUT = 300
+
+NEGATIVE_CACHE_TIMEOUT = 60
+
+RATE_LIMIT_BACKEND = 'blog.ratelimit.LocalRateLimiter'
+
+RATE_LIMIT_CACHE = 'default'
+
+# Сколько своих прокси (nginx и т. п.) стоит перед сайтом: столько
+# последних адресов X-Forwarded-For им доверяется. 0 — брать REMOTE_ADDR.
+RATE_LIMIT_TRUSTED_PROXIES = 0
+
+# Имя URL -> (запросов, за сколько секунд) для одного клиента.
+RATE_LIMITS = {
+    'blog:add_comment': (10, 60),
+    'blog:create_post': (5, 60),
+    'registration': (5, 3600),
+    'login': (10, 300),
+}
+
+LOAD_SHED_MAX_IN_FLIGHT = 64
+
+LOAD_SHED_MAX_LATENCY = 2.0
+
+LOAD_SHED_RETRY_AFTER = 5
+
+# С какого числа комментариев пост или пользователь удаляется в фоне.
+BULK_DELETE_BACKGROUND_THRESHOLD = 5000
+
+BULK_DELETE_CHUNK_SIZE = 1000
+
+BULK_DELETE_MAX_ATTEMPTS = 5
+
+# Страницы, каркас которых кэшируется на прокси с ESI (см. blog.edge).
+EDGE_CACHE_VIEWS = (
+    'blog:index', 'blog:category_posts', 'blog:post_detail', 'blog:profile'
+)
+
+EDGE_CACHE_MAX_AGE = 60
@@ -1,9 +1,10 @@
 from django.contrib import admin
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
+from blog.media import serve as serve_media
+from blog.staticfiles import serve as serve_static
 from blog.views import ProfileLoginView
 
 handler403 = 'pages.views.csrf_failure'
@@ -12,6 +13,7 @@ handler500 = 'pages.views.internal_server_error'
 
 urlpatterns = [
     path('', include('blog.urls', namespace='blog')),
+    path('api/v1/', include('blog.api_urls', namespace='api')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('admin/', admin.site.urls),
     path('auth/', include('django.contrib.auth.urls')),
@@ -27,4 +29,13 @@ urlpatterns = [
     path('auth/login/', ProfileLoginView.as_view(), name='login'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+urlpatterns += [
+    re_path(
+        r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'),
+        serve_media,
+    ),
+    re_path(
+        r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'),
+        serve_static,
+    ),
+]
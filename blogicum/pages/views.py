@@ -1,7 +1,17 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponseNotFound
 from django.shortcuts import render
-
+from django.template.loader import render_to_string
+from django.utils.html import escape
 from django.views.generic import TemplateView
 
+from blog.edge import leave_shell
+
+# Вместо адреса в закэшированный текст 404 подставляется этот маркер.
+REQUESTED_URL = '__REQUESTED_URL__'
+NOT_FOUND_CACHE_KEY = 'pages:404'
+
 
 class AboutView(TemplateView):
     """Раздел о проекте."""
@@ -14,8 +24,27 @@ class RulesView(TemplateView):
 
 
 def page_not_found(request, exception):
-    """Ошибка: страница не найдена."""
-    return render(request, 'pages/404.html', status=404)
+    """Ошибка: страница не найдена.
+
+    Для анонимов (а это почти все боты) страница рендерится один раз и
+    дальше берётся из кэша, в неё подставляется только адрес запроса.
+    """
+    # Прокси ответы 404 не кэширует, а закэшированное у нас тело
+    # отдаётся всем клиентам, поэтому страница собирается без ESI.
+    leave_shell(request)
+    url = request.build_absolute_uri()
+    if request.user.is_authenticated:
+        return render(
+            request, 'pages/404.html', {'requested_url': url}, status=404
+        )
+    cache = caches[settings.NOT_FOUND_CACHE]
+    body = cache.get(NOT_FOUND_CACHE_KEY)
+    if body is None:
+        body = render_to_string(
+            'pages/404.html', {'requested_url': REQUESTED_URL}, request
+        )
+        cache.set(NOT_FOUND_CACHE_KEY, body, settings.NOT_FOUND_CACHE_TIMEOUT)
+    return HttpResponseNotFound(body.replace(REQUESTED_URL, escape(url)))
 
 
 def csrf_failure(request, reason=''):
@@ -0,0 +1,52 @@
+// Комментарии без перезагрузки страницы. Без JS всё работает через
+// обычные переходы и редиректы, сервер отдаёт фрагменты только на
+// запросы с заголовком X-Requested-With.
+var FRAGMENT_HEADERS = {'X-Requested-With': 'XMLHttpRequest'};
+
+document.addEventListener('click', function (event) {
+  var more = event.target.closest('[data-load-more]');
+  var edit = event.target.closest('[data-fragment-link]');
+  if (more) {
+    event.preventDefault();
+    fetch(more.href, {headers: FRAGMENT_HEADERS})
+      .then(function (response) { return response.text(); })
+      .then(function (html) { more.outerHTML = html; });
+  } else if (edit) {
+    event.preventDefault();
+    fetch(edit.href, {headers: FRAGMENT_HEADERS})
+      .then(function (response) { return response.text(); })
+      .then(function (html) { edit.closest('[data-comment]').outerHTML = html; });
+  }
+});
+
+document.addEventListener('submit', function (event) {
+  var form = event.target.closest('[data-fragment-form]');
+  if (!form) {
+    return;
+  }
+  var target = form.dataset.append && document.querySelector(form.dataset.append);
+  // Новый комментарий должен оказаться в конце списка; если загружены
+  // не все страницы, проще отправить форму обычным способом.
+  if (target && target.querySelector('[data-load-more]')) {
+    return;
+  }
+  event.preventDefault();
+  fetch(form.action, {
+    method: 'POST',
+    body: new FormData(form),
+    headers: FRAGMENT_HEADERS
+  }).then(function (response) {
+    if (!response.ok && response.status !== 400) {
+      form.submit();
+      return;
+    }
+    return response.text().then(function (html) {
+      if (response.ok && target) {
+        target.insertAdjacentHTML('beforeend', html);
+        form.reset();
+      } else {
+        form.outerHTML = html;
+      }
+    });
+  });
+});
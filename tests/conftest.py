@@ -83,6 +83,27 @@ pytest_plugins = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def discard_buffered_views():
+    yield
+    from blog.counters import get_view_counter
+    get_view_counter().collect()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    yield
+    from blog.ratelimit import get_rate_limiter
+    get_rate_limiter.cache_clear()
+
+
 @pytest.fixture
 def mixer():
     return _mixer
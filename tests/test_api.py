@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_api_post_list_keyset(client, many_posts_with_published_locations):
+    response = client.get('/api/v1/posts/?limit=7')
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert len(data['results']) == 7, (
+        'Убедитесь, что API отдаёт не больше `limit` публикаций.')
+    seen = [row['id'] for row in data['results']]
+    while data['next']:
+        data = client.get(
+            f'/api/v1/posts/?limit=7&cursor={data["next"]}').json()
+        seen.extend(row['id'] for row in data['results'])
+    expected = [
+        post.id for post in sorted(
+            many_posts_with_published_locations,
+            key=lambda post: (post.pub_date, post.id), reverse=True)
+    ]
+    assert seen == expected, (
+        'Убедитесь, что курсоры API обходят все публикации '
+        '«от новых к старым» без пропусков и повторов.')
+
+
+def test_api_etag(client, post_with_published_location):
+    response = client.get('/api/v1/posts/')
+    etag = response['ETag']
+    response = client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_api_hides_unpublished(client, posts_with_unpublished_category):
+    data = client.get('/api/v1/posts/').json()
+    assert data['results'] == []
+    post = posts_with_unpublished_category[0]
+    response = client.get(f'/api/v1/posts/{post.id}/comments/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = client.get(f'/api/v1/categories/{post.category.slug}/posts/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_comments(client, comment_to_a_post):
+    post_id = comment_to_a_post.post_id
+    data = client.get(f'/api/v1/posts/{post_id}/comments/').json()
+    assert [row['id'] for row in data['results']] == [comment_to_a_post.id]
+    response = client.get(f'/api/v1/posts/{post_id}/comments/?cursor=%%%')
+    assert response.status_code == HTTPStatus.BAD_REQUEST
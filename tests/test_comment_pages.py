@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_comments_paginated(
+        settings, mixer, user_client: Client, post_with_published_location):
+    settings.COMMENTS_PAGINATE_BY = 3
+    post = post_with_published_location
+    comments = mixer.cycle(7).blend('blog.Comment', post=post)
+    response = user_client.get(f'/posts/{post.id}/')
+    assert len(response.context['comments']) == 3, (
+        'Убедитесь, что на странице публикации выводится не больше '
+        '`COMMENTS_PAGINATE_BY` комментариев.')
+
+    seen = [comment.id for comment in response.context['comments']]
+    cursor = response.context['next_cursor']
+    while cursor:
+        response = user_client.get(
+            f'/posts/{post.id}/comments/?cursor={cursor}')
+        assert response.status_code == HTTPStatus.OK
+        seen.extend(comment.id for comment in response.context['comments'])
+        cursor = response.context['next_cursor']
+    assert seen == [comment.id for comment in comments], (
+        'Убедитесь, что подгрузка комментариев возвращает их все '
+        '«от старых к новым» без пропусков и повторов.')
+
+
+def test_comments_page_hidden_for_unpublished(
+        mixer, client: Client, published_category):
+    post = mixer.blend(
+        'blog.Post', is_published=False, category=published_category)
+    response = client.get(f'/posts/{post.id}/comments/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+FRAGMENT_HEADERS = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+def test_add_comment_fragment(user_client: Client, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.post(
+        f'/posts/{post.id}/comment/', {'text': 'Fragment comment'},
+        **FRAGMENT_HEADERS)
+    assert response.status_code == HTTPStatus.OK, (
+        'Убедитесь, что при запросе фрагмента новый комментарий '
+        'возвращается без редиректа.')
+    content = response.content.decode('utf-8')
+    assert 'Fragment comment' in content
+    assert '<html' not in content
+
+    response = user_client.post(
+        f'/posts/{post.id}/comment/', {'text': ''}, **FRAGMENT_HEADERS)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = user_client.post(
+        f'/posts/{post.id}/comment/', {'text': 'Redirect comment'})
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_edit_comment_fragment(mixer, user, user_client: Client,
+                               post_with_published_location):
+    comment = mixer.blend(
+        'blog.Comment', post=post_with_published_location, author=user)
+    url = f'/posts/{comment.post_id}/edit_comment/{comment.id}/'
+    response = user_client.get(url, **FRAGMENT_HEADERS)
+    assert response.status_code == HTTPStatus.OK
+    assert '<form' in response.content.decode('utf-8')
+
+    response = user_client.post(
+        url, {'text': 'Edited in place'}, **FRAGMENT_HEADERS)
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode('utf-8')
+    assert 'Edited in place' in content
+    assert f'id="comment_{comment.id}"' in content
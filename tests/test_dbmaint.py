@@ -0,0 +1,64 @@
+import re
+import sqlite3
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def dbmaint(*args):
+    out, err = StringIO(), StringIO()
+    call_command('dbmaint', *args, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+
+# Копия снимается с зафиксированных данных, а не из открытой транзакции.
+@pytest.mark.django_db(transaction=True)
+def test_dbmaint_backup(tmp_path, mixer, user):
+    mixer.cycle(3).blend('blog.Post', author=user)
+    for _ in range(3):
+        dbmaint('--backup', str(tmp_path), '--keep', '2', '--pages', '4',
+                '--pause', '0')
+    backups = sorted(tmp_path.iterdir())
+    assert len(backups) == 2, (
+        'Убедитесь, что копии не перезаписывают друг друга, а старые '
+        'удаляются.')
+    assert not list(tmp_path.glob('*.part'))
+    copy = sqlite3.connect(backups[-1])
+    try:
+        assert copy.execute('SELECT COUNT(*) FROM blog_post').fetchone() == (
+            3,), 'Убедитесь, что копия содержит данные.'
+    finally:
+        copy.close()
+
+
+def test_dbmaint_report():
+    out, err = dbmaint('--optimize', '--vacuum')
+    assert 'свободных страниц' in out
+    assert 'blog_post' in out, (
+        'Убедитесь, что отчёт показывает размеры таблиц и индексов.')
+    assert '--enable-incremental-vacuum' in err
+
+
+@pytest.mark.django_db(transaction=True)
+def test_dbmaint_incremental_vacuum(mixer, user):
+    dbmaint('--enable-incremental-vacuum')
+    mixer.cycle(200).blend('blog.Post', author=user, text='x' * 2000)
+    Post.objects.all().delete()
+    with connection.cursor() as cursor:
+        free = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+    assert free > 10
+    out, err = dbmaint('--vacuum', '--pages', '4', '--pause', '0')
+    assert not err
+    assert re.search(r'Освобождено страниц: (\d+)', out).group(1) == str(
+        free), 'Убедитесь, что освобождаются все свободные страницы.'
+    with connection.cursor() as cursor:
+        assert cursor.execute(
+            'PRAGMA freelist_count').fetchone()[0] == 0
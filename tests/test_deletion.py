@@ -0,0 +1,119 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.deletion import remove
+from blog.models import (
+    AuthorStats, CategoryStats, Comment, DeletionJob, Post, PostRank)
+from blog.stats import compute
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def assert_stats_consistent(model):
+    for row in model.objects.all():
+        expected = compute(model, [row.pk]).get(row.pk)
+        counts = (row.post_count, row.comment_count)
+        if expected is None:
+            assert counts == (0, 0)
+        else:
+            assert counts == (
+                expected['post_count'], expected['comment_count']
+            ), 'Убедитесь, что быстрое удаление поправляет статистику.'
+
+
+def test_post_deleted_in_bulk(
+        mixer, user, user_client, another_user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True)
+    mixer.cycle(30).blend('blog.Comment', post=post, author=another_user)
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.post(f'/posts/{post.id}/delete/')
+    assert response.status_code == 302
+    assert not Post.objects.filter(pk=post.pk).exists()
+    assert not Comment.objects.exists()
+    assert len(queries) < 30, (
+        'Убедитесь, что комментарии удаляются одним запросом, а не '
+        'по одному.')
+    assert AuthorStats.objects.get(pk=another_user.pk).comment_count == 0
+    assert_stats_consistent(CategoryStats)
+
+
+def test_user_deleted_in_bulk(
+        mixer, user, another_user, published_category):
+    own, other = (
+        mixer.blend(
+            'blog.Post', author=author, category=published_category,
+            is_published=True)
+        for author in (user, another_user)
+    )
+    mixer.cycle(3).blend('blog.Comment', post=own, author=another_user)
+    mixer.cycle(2).blend('blog.Comment', post=other, author=user)
+    mixer.blend('blog.Comment', post=other, author=another_user)
+    remove(user)
+    assert not Post.objects.filter(pk=own.pk).exists()
+    assert Comment.objects.count() == 1
+    assert PostRank.objects.get(post=other).comment_count == 1, (
+        'Убедитесь, что удаление комментариев учитывается в рейтинге.')
+    assert_stats_consistent(AuthorStats)
+    assert_stats_consistent(CategoryStats)
+
+
+@override_settings(BULK_DELETE_BACKGROUND_THRESHOLD=2)
+def test_huge_fan_out_deleted_in_background(mixer, user, another_user):
+    post = mixer.blend('blog.Post', author=user, is_published=True)
+    mixer.cycle(3).blend('blog.Comment', post=post, author=another_user)
+    assert remove(post) is False, (
+        'Убедитесь, что пост с большим числом комментариев удаляется '
+        'в фоне.')
+    post.refresh_from_db()
+    assert not post.is_published
+    assert DeletionJob.objects.count() == 1
+    call_command(
+        'process_deletions', '--chunk-size', '2', stdout=StringIO())
+    assert not Post.objects.filter(pk=post.pk).exists()
+    assert not DeletionJob.objects.exists()
+
+
+@override_settings(BULK_DELETE_BACKGROUND_THRESHOLD=2)
+def test_user_posts_hidden_until_background_delete(
+        mixer, user, another_user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True)
+    mixer.cycle(3).blend('blog.Comment', post=post, author=another_user)
+    assert remove(user) is False
+    post.refresh_from_db()
+    assert not post.is_published, (
+        'Убедитесь, что посты пользователя, удаляемого в фоне, сразу '
+        'снимаются с публикации.')
+    assert not PostRank.objects.get(post=post).is_listed
+    assert not AuthorStats.objects.filter(
+        pk=user.pk, post_count__gt=0).exists()
+    assert_stats_consistent(CategoryStats)
+
+
+@override_settings(BULK_DELETE_MAX_ATTEMPTS=2)
+def test_failing_job_not_retried_forever(monkeypatch, user):
+    job = DeletionJob.objects.create(
+        target=DeletionJob.USER, object_id=user.pk)
+
+    def fail(job, chunk_size):
+        raise RuntimeError('сбой')
+
+    monkeypatch.setattr(
+        'blog.management.commands.process_deletions.run', fail)
+    for _ in range(3):
+        call_command(
+            'process_deletions', stdout=StringIO(), stderr=StringIO())
+    job.refresh_from_db()
+    assert job.attempts == 2, (
+        'Убедитесь, что число попыток выполнения задачи ограничено.')
+    assert job.last_error == 'RuntimeError: сбой'
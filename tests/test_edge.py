@@ -0,0 +1,133 @@
+import pytest
+from django.urls import reverse
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+EDGE = {'HTTP_SURROGATE_CAPABILITY': 'edge="ESI/1.0"'}
+
+
+@pytest.fixture
+def own_post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        location=None, is_published=True)
+
+
+def test_shell_is_public(user_client, user, own_post):
+    comment = own_post.comment.create(author=user, text='Текст')
+    url = reverse('blog:post_detail', args=(own_post.id,))
+    response = user_client.get(url, **EDGE)
+    assert 'private' in response['Cache-Control'], (
+        'Убедитесь, что ответ, продлевающий сессию, не кэшируется.')
+    response = user_client.get(url, **EDGE)
+    assert response.status_code == 200
+    assert 'public' in response['Cache-Control'], (
+        'Убедитесь, что каркас страницы для прокси кэшируется публично.')
+    assert response['Surrogate-Control'] == 'content="ESI/1.0"'
+    assert 'Cookie' not in response.get('Vary', '')
+    content = response.content.decode()
+    assert 'csrfmiddlewaretoken' not in content
+    assert reverse('blog:edit_post', args=(own_post.id,)) not in content, (
+        'Убедитесь, что ссылки автора не попадают в общий каркас.')
+    for src in (
+        '/fragments/user_nav/',
+        f'/fragments/post_actions/?post={own_post.id}',
+        f'/fragments/new_comment/?post={own_post.id}',
+    ):
+        assert f'<esi:include src="{src}"/>' in content
+    assert content.count('<esi:include') == 3, (
+        'Убедитесь, что число фрагментов не зависит от числа '
+        'комментариев.')
+    assert f'hidden data-author="{user.username}"' in content
+    assert reverse(
+        'blog:edit_comment', args=(own_post.id, comment.id)) in content
+
+
+def test_fragments(user_client, user, own_post):
+    response = user_client.get(
+        f'/fragments/new_comment/?post={own_post.id}')
+    assert 'csrfmiddlewaretoken' in response.content.decode()
+    assert 'no-store' in response['Cache-Control'], (
+        'Убедитесь, что фрагменты посетителя не кэшируются.')
+    response = user_client.get(
+        f'/fragments/post_actions/?post={own_post.id}')
+    assert reverse('blog:edit_post', args=(own_post.id,)) in (
+        response.content.decode())
+    response = user_client.get('/fragments/user_nav/')
+    assert f'[data-author="{user.username}"][hidden]' in (
+        response.content.decode()), (
+        'Убедитесь, что фрагмент меню показывает ссылки автора '
+        'у его комментариев.')
+    assert user_client.get('/fragments/unknown/').status_code == 404
+    assert user_client.get(
+        '/fragments/post_actions/?post=x').status_code == 404
+
+
+def test_direct_client_gets_inline_page(user_client, own_post):
+    response = user_client.get(
+        reverse('blog:post_detail', args=(own_post.id,)))
+    content = response.content.decode()
+    assert '<esi:include' not in content, (
+        'Убедитесь, что без Surrogate-Capability фрагменты '
+        'вставляются в страницу сразу.')
+    assert 'csrfmiddlewaretoken' in content
+
+
+def test_unpublished_post_not_shared(user_client, client, own_post):
+    own_post.is_published = False
+    own_post.save()
+    url = reverse('blog:post_detail', args=(own_post.id,))
+    response = user_client.get(url, **EDGE)
+    assert response.status_code == 200
+    assert 'private' in response['Cache-Control'], (
+        'Убедитесь, что неопубликованный пост автора не кэшируется '
+        'на прокси.')
+    assert reverse('blog:edit_post', args=(own_post.id,)) in (
+        response.content.decode())
+    response = client.get(url, **EDGE)
+    assert response.status_code == 404
+    assert '<esi:include' not in response.content.decode()
+
+
+def test_views_counted_by_fragment(monkeypatch, client, own_post):
+    counted = []
+
+    class Counter:
+        def increment(self, post_id):
+            counted.append(post_id)
+
+    monkeypatch.setattr('blog.views.get_view_counter', Counter)
+    client.get(reverse('blog:post_detail', args=(own_post.id,)), **EDGE)
+    assert counted == [], (
+        'Убедитесь, что кэшируемый каркас поста не считает просмотры.')
+    client.get(f'/fragments/post_actions/?post={own_post.id}', **EDGE)
+    client.get(reverse('blog:post_detail', args=(own_post.id,)))
+    assert counted == [own_post.id, own_post.id]
+    client.get(f'/fragments/post_actions/?post={own_post.id}')
+    assert counted == [own_post.id, own_post.id], (
+        'Убедитесь, что фрагмент считает просмотр только в запросах от '
+        'прокси.')
+
+
+def test_fragments_hide_invisible_posts(
+        monkeypatch, client, another_user_client, own_post):
+    counted = []
+
+    class Counter:
+        def increment(self, post_id):
+            counted.append(post_id)
+
+    monkeypatch.setattr('blog.views.get_view_counter', Counter)
+    own_post.is_published = False
+    own_post.save()
+    for name in ('post_actions', 'new_comment'):
+        for visitor in (client, another_user_client):
+            response = visitor.get(
+                f'/fragments/{name}/?post={own_post.id}', **EDGE)
+            assert response.status_code == 404, (
+                'Убедитесь, что фрагменты не отдают чужие '
+                'неопубликованные посты.')
+    assert not counted, (
+        'Убедитесь, что просмотры невидимых постов не считаются.')
@@ -0,0 +1,51 @@
+import csv
+import datetime as dt
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def export(path, *args):
+    call_command('export_blog', str(path), *args, stdout=StringIO())
+
+
+def test_export_jsonl(tmp_path, mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        location=None)
+    mixer.blend('blog.Comment', post=post, author=user)
+    export(tmp_path)
+    posts = [
+        json.loads(line)
+        for line in (tmp_path / 'posts.jsonl').read_text().splitlines()
+    ]
+    assert len(posts) == 1
+    assert posts[0]['author'] == user.username, (
+        'Убедитесь, что внешние ключи выгружаются естественными ключами.')
+    assert posts[0]['category'] == published_category.slug
+    comments = (tmp_path / 'comments.jsonl').read_text().splitlines()
+    assert json.loads(comments[0])['post'] == post.id
+
+
+def test_export_csv_since(tmp_path, mixer, user):
+    old, new = mixer.cycle(2).blend('blog.Post', author=user)
+    Post.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - dt.timedelta(days=10))
+    since = (timezone.now() - dt.timedelta(days=1)).isoformat()
+    export(tmp_path, '--format', 'csv', '--gzip', '--since', since,
+           '--tables', 'posts')
+    with gzip.open(tmp_path / 'posts.csv.gz', 'rt', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    assert [int(row['id']) for row in rows] == [new.id], (
+        'Убедитесь, что --since выгружает только новые записи.')
+    assert not (tmp_path / 'users.csv.gz').exists()
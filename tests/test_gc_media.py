@@ -0,0 +1,70 @@
+import os
+import time
+from io import StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+from blog.models import MediaFile
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def make_file(root, name, age):
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * 10)
+    moment = time.time() - age
+    os.utime(path, (moment, moment))
+    return path
+
+
+def test_gc_media(settings, tmp_path, mixer):
+    settings.MEDIA_ROOT = tmp_path
+    post = mixer.blend('blog.Post', image='')
+    post.image.save('kept.jpg', ContentFile(b'kept'))
+    kept = tmp_path / post.image.name
+    os.utime(kept, (0, 0))
+    orphan = make_file(tmp_path, 'old/orphan.jpg', age=10 ** 6)
+    fresh = make_file(tmp_path, 'fresh.jpg', age=10)
+    MediaFile.objects.create(name='old/orphan.jpg')
+
+    out = StringIO()
+    call_command('gc_media', '--dry-run', stdout=out)
+    assert 'old/orphan.jpg' in out.getvalue()
+    assert orphan.exists(), 'Убедитесь, что --dry-run ничего не удаляет.'
+
+    call_command('gc_media', '--batch-size', '1', stdout=StringIO())
+    assert not orphan.exists(), (
+        'Убедитесь, что gc_media удаляет старые файлы без ссылок.')
+    assert kept.exists(), 'Убедитесь, что файлы постов не удаляются.'
+    assert fresh.exists(), 'Убедитесь, что молодые файлы не удаляются.'
+    assert not MediaFile.objects.filter(name='old/orphan.jpg').exists()
+
+
+def test_gc_media_rechecks_before_removing(
+        settings, tmp_path, mixer, monkeypatch):
+    from blog.management.commands import gc_media
+
+    settings.MEDIA_ROOT = tmp_path
+    reused = make_file(tmp_path, 'cas/reused.jpg', age=10 ** 6)
+    touched = make_file(tmp_path, 'cas/touched.jpg', age=10 ** 6)
+    scan = gc_media.scan
+
+    def scan_then_reuse(root):
+        yield from scan(root)
+        # Между обходом и удалением файлы снова понадобились постам.
+        mixer.blend('blog.Post', image='cas/reused.jpg')
+        os.utime(touched)
+
+    monkeypatch.setattr(gc_media, 'scan', scan_then_reuse)
+    call_command('gc_media', stdout=StringIO())
+    assert reused.exists(), (
+        'Убедитесь, что gc_media перед удалением проверяет, не сослался '
+        'ли на файл новый пост.')
+    assert touched.exists(), (
+        'Убедитесь, что gc_media перед удалением проверяет время '
+        'изменения файла.')
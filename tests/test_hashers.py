@@ -0,0 +1,38 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+PASSWORD = 'test-Pa55word'
+
+
+def iterations(user):
+    user.refresh_from_db()
+    algorithm, count, _, _ = user.password.split('$')
+    assert algorithm == 'pbkdf2_sha256'
+    return int(count)
+
+
+def login(client, user):
+    response = client.post(
+        '/auth/login/',
+        {'username': user.username, 'password': PASSWORD},
+    )
+    assert response.status_code == 302, 'Убедитесь, что вход работает.'
+
+
+@pytest.mark.parametrize('old, new', ((1000, 2000), (2000, 1000)))
+def test_rehash_on_login(client, old, new):
+    with override_settings(PASSWORD_HASH_ITERATIONS=old):
+        user = get_user_model().objects.create_user(
+            'hasher', password=PASSWORD)
+    assert iterations(user) == old, (
+        'Убедитесь, что число итераций берётся из '
+        'PASSWORD_HASH_ITERATIONS.')
+    with override_settings(PASSWORD_HASH_ITERATIONS=new):
+        login(client, user)
+    assert iterations(user) == new, (
+        'Убедитесь, что хеш пароля пересчитывается при входе.')
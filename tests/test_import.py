@@ -0,0 +1,125 @@
+import datetime as dt
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from blog.models import AuthorStats, Comment, Post, PostRank
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def run(command, path, *args):
+    call_command(command, str(path), *args, stdout=StringIO(),
+                 stderr=StringIO())
+
+
+CREATED_AT = (timezone.now() - dt.timedelta(days=30)).replace(microsecond=0)
+
+
+@pytest.fixture
+def dump(tmp_path, mixer, user, published_category):
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category,
+        location=None, is_published=True, text='Текст поста')
+    mixer.cycle(2).blend('blog.Comment', post=posts[0], author=user)
+    Post.objects.update(created_at=CREATED_AT)
+    run('export_blog', tmp_path, '--gzip')
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    User.objects.filter(pk=user.pk).delete()
+    return tmp_path
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_import_round_trip(dump, workers):
+    run('import_blog', dump, '--batch-size', '2', '--workers', workers)
+    assert Post.objects.count() == 3
+    assert Comment.objects.count() == 2
+    author = Post.objects.first().author
+    assert not author.has_usable_password(), (
+        'Убедитесь, что загруженным пользователям не задаётся пароль.')
+    assert AuthorStats.objects.get(user=author).post_count == 3, (
+        'Убедитесь, что после загрузки статистика пересчитывается.')
+    assert PostRank.objects.count() == 3
+    assert Post.objects.filter(excerpt='Текст поста').count() == 3
+    assert Post.objects.filter(created_at=CREATED_AT).count() == 3, (
+        'Убедитесь, что время создания берётся из выгрузки.')
+
+
+def test_import_resets_sequences(dump, monkeypatch):
+    from django.db import connection
+
+    reset = []
+    monkeypatch.setattr(
+        connection.ops, 'sequence_reset_sql',
+        lambda style, models: reset.extend(models) or [])
+    run('import_blog', dump)
+    assert {Post, Comment} <= set(reset), (
+        'Убедитесь, что после загрузки с id из выгрузки сдвигаются '
+        'последовательности первичных ключей постов и комментариев.')
+
+
+def test_import_resumes_from_checkpoint(dump):
+    checkpoint = dump / '.import_blog.json'
+    checkpoint.write_text(json.dumps(
+        {'lines': {'posts.jsonl.gz': 2}, 'finished': False}))
+    run('import_blog', dump)
+    assert Post.objects.count() == 1, (
+        'Убедитесь, что загрузка продолжается с контрольной точки.')
+    state = json.loads(checkpoint.read_text())
+    assert state['finished'], (
+        'Убедитесь, что завершённая загрузка отмечается в контрольной '
+        'точке.')
+    assert state['lines']['posts.jsonl.gz'] == 3
+    # Пачка записана, а контрольная точка — нет.
+    state['lines']['posts.jsonl.gz'] = 2
+    checkpoint.write_text(json.dumps(state))
+    run('import_blog', dump)
+    assert Post.objects.count() == 1, (
+        'Убедитесь, что уже записанная пачка при возобновлении '
+        'пропускается.')
+
+
+def test_import_refuses_taken_ids(dump, mixer, another_user):
+    exported = json.loads(
+        gzip.open(dump / 'posts.jsonl.gz', 'rt').readline())
+    taken = mixer.blend('blog.Post', id=exported['id'], author=another_user)
+    created_at = taken.created_at
+    with pytest.raises(CommandError):
+        run('import_blog', dump)
+    taken.refresh_from_db()
+    assert taken.author == another_user
+    assert taken.created_at == created_at, (
+        'Убедитесь, что загрузка не меняет существующие посты.')
+    assert not Comment.objects.exists()
+
+
+def test_import_refreshes_only_touched(dump, mixer, another_user):
+    other = mixer.blend('blog.Post', author=another_user)
+    rank = PostRank.objects.get(post=other)
+    run('import_blog', dump)
+    assert PostRank.objects.get(post=other).pk == rank.pk, (
+        'Убедитесь, что после загрузки пересчитываются только '
+        'затронутые рейтинги.')
+    assert PostRank.objects.count() == 4
+    assert AuthorStats.objects.filter(
+        user__posts__in=Post.objects.exclude(pk=other.pk),
+        post_count=3).exists()
+
+
+def test_import_skips_invalid_rows(tmp_path):
+    (tmp_path / 'users.jsonl').write_text(
+        '{"username": "reader"}\n'
+        '{"username": null}\n'
+        'не json\n'
+    )
+    run('import_blog', tmp_path)
+    assert list(User.objects.values_list('username', flat=True)) == [
+        'reader'], 'Убедитесь, что ошибочные строки пропускаются.'
@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.files.base import ContentFile
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+IMAGE_BYTES = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def post_with_image(settings, tmp_path, post_with_published_location):
+    settings.MEDIA_ROOT = tmp_path
+    post = post_with_published_location
+    post.image.save('photo.jpg', ContentFile(IMAGE_BYTES))
+    return post
+
+
+def test_media_served_with_ranges(client, post_with_image):
+    url = post_with_image.image.url
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert b''.join(response.streaming_content) == IMAGE_BYTES
+    assert response['Accept-Ranges'] == 'bytes'
+
+    response = client.get(url, HTTP_RANGE='bytes=10-19')
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert b''.join(response.streaming_content) == IMAGE_BYTES[10:20]
+    assert response['Content-Range'] == f'bytes 10-19/{len(IMAGE_BYTES)}'
+
+    response = client.get(url, HTTP_RANGE='bytes=-5')
+    assert b''.join(response.streaming_content) == IMAGE_BYTES[-5:]
+
+    response = client.get(url, HTTP_RANGE=f'bytes={len(IMAGE_BYTES)}-')
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+
+
+def test_media_hidden_for_unpublished(client, user_client, post_with_image):
+    post_with_image.is_published = False
+    post_with_image.save()
+    url = post_with_image.image.url
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что изображения снятых с публикации постов '
+        'недоступны посторонним.')
+    assert user_client.get(url).status_code == HTTPStatus.OK, (
+        'Убедитесь, что автор видит изображения своих постов.')
+
+
+def test_media_accel_redirect(settings, client, post_with_image):
+    settings.MEDIA_SENDFILE_BACKEND = 'nginx'
+    response = client.get(post_with_image.image.url)
+    assert response['X-Accel-Redirect'] == (
+        f'/protected-media/{post_with_image.image.name}')
+    assert response.content == b''
@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, len(queries)
+
+
+def test_missing_category_cached(mixer, client):
+    response, _ = get(client, '/category/no-such-category/')
+    assert response.status_code == 404
+    response, queries = get(client, '/category/no-such-category/')
+    assert response.status_code == 404
+    assert queries == 0, (
+        'Убедитесь, что повторный запрос несуществующей категории не '
+        'обращается к базе данных.')
+
+    mixer.blend(
+        'blog.Category', slug='no-such-category', is_published=True)
+    response, _ = get(client, '/category/no-such-category/')
+    assert response.status_code == 200, (
+        'Убедитесь, что кэш промахов сбрасывается при создании категории.')
+
+
+def test_missing_user_cached(mixer, client):
+    response, _ = get(client, '/profile/ghost/')
+    assert response.status_code == 404
+    response, queries = get(client, '/profile/ghost/')
+    assert queries == 0
+    mixer.blend('auth.User', username='ghost')
+    response, _ = get(client, '/profile/ghost/')
+    assert response.status_code == 200, (
+        'Убедитесь, что кэш промахов сбрасывается при создании '
+        'пользователя.')
+
+
+def test_not_found_body_cached(client, user_client):
+    first = client.get('/nothing-here/')
+    second = client.get('/nothing-else/')
+    assert first.status_code == second.status_code == 404
+    assert not second.templates, (
+        'Убедитесь, что страница 404 для анонимов берётся из кэша.')
+    assert '/nothing-else/' in second.content.decode(), (
+        'Убедитесь, что в закэшированную страницу 404 подставляется '
+        'адрес запроса.')
+    response = user_client.get('/nothing-here/')
+    assert response.status_code == 404
+    assert 'Выйти' in response.content.decode()
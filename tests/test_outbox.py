@@ -0,0 +1,135 @@
+import socketserver
+import threading
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import OutboxMessage
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и считает соединения."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 stand-in')
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 stand-in')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                data = []
+                for data_line in self.rfile:
+                    if data_line == b'.\r\n':
+                        break
+                    data.append(data_line)
+                self.server.messages.append(b''.join(data))
+                self.reply('250 queued')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                break
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStandIn)
+    server.connections = 0
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.OUTBOX_DELIVERY_BACKEND = (
+        'django.core.mail.backends.smtp.EmailBackend')
+    settings.EMAIL_HOST, settings.EMAIL_PORT = server.server_address
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def send_test_mail(n):
+    for i in range(n):
+        mail.send_mail(
+            f'Тема {i}', 'Текст', 'blog@example.com', [f'user{i}@example.com'],
+            connection=mail.get_connection('blog.mail.OutboxEmailBackend'))
+
+
+def test_outbox_batches_over_one_connection(smtp_server):
+    send_test_mail(3)
+    assert OutboxMessage.objects.filter(
+        status=OutboxMessage.QUEUED).count() == 3, (
+        'Убедитесь, что письма сохраняются в очередь, а не отправляются.')
+    call_command('send_outbox', batch_size=10)
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1, (
+        'Убедитесь, что пачка писем отправляется через одно соединение.')
+    assert OutboxMessage.objects.filter(
+        status=OutboxMessage.SENT).count() == 3
+
+
+def test_outbox_retries_then_dead_letters(settings):
+    settings.OUTBOX_DELIVERY_BACKEND = (
+        'django.core.mail.backends.smtp.EmailBackend')
+    settings.EMAIL_HOST, settings.EMAIL_PORT = '127.0.0.1', 1
+    settings.OUTBOX_MAX_ATTEMPTS = 2
+    send_test_mail(1)
+    call_command('send_outbox')
+    message = OutboxMessage.objects.get()
+    assert message.status == OutboxMessage.QUEUED
+    assert message.attempts == 1
+    assert message.next_attempt_at > timezone.now()
+
+    message.next_attempt_at = timezone.now() - timedelta(seconds=1)
+    message.save()
+    call_command('send_outbox')
+    message.refresh_from_db()
+    assert message.status == OutboxMessage.FAILED
+
+
+def test_outbox_skips_claimed_messages(smtp_server, settings):
+    send_test_mail(3)
+    claimed, stale, free = OutboxMessage.objects.order_by('id')
+    claimed.claimed_by, claimed.claimed_at = 'other', timezone.now()
+    stale.claimed_by = 'crashed'
+    stale.claimed_at = timezone.now() - timedelta(
+        seconds=settings.OUTBOX_CLAIM_TIMEOUT + 1)
+    OutboxMessage.objects.bulk_update(
+        (claimed, stale), ('claimed_by', 'claimed_at'))
+    call_command('send_outbox')
+    assert len(smtp_server.messages) == 2, (
+        'Убедитесь, что письма, взятые другим запуском send_outbox, '
+        'не отправляются повторно.')
+    assert set(OutboxMessage.objects.filter(
+        status=OutboxMessage.SENT).values_list('pk', flat=True)) == {
+        stale.pk, free.pk}, (
+        'Убедитесь, что устаревшее взятие письма не мешает его отправке.')
+    assert not OutboxMessage.objects.filter(
+        status=OutboxMessage.SENT, claimed_at__isnull=False).exists()
+
+
+def test_password_reset_goes_through_outbox(settings, tmp_path, client, user):
+    settings.EMAIL_BACKEND = 'blog.mail.OutboxEmailBackend'
+    settings.OUTBOX_DELIVERY_BACKEND = (
+        'django.core.mail.backends.filebased.EmailBackend')
+    settings.EMAIL_FILE_PATH = tmp_path
+    user.email = 'reset@example.com'
+    user.save()
+    client.post('/auth/password_reset/', {'email': user.email})
+    assert OutboxMessage.objects.filter(
+        recipients=[user.email]).exists(), (
+        'Убедитесь, что письмо для сброса пароля ставится в очередь.')
+    assert not list(tmp_path.iterdir())
+    call_command('send_outbox')
+    sent = ''.join(path.read_text() for path in tmp_path.iterdir())
+    assert 'To: reset@example.com' in sent
@@ -0,0 +1,124 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, [
+        query['sql'] for query in queries if 'COUNT(' in query['sql']
+    ]
+
+
+def test_category_count_cached(mixer, client, published_category):
+    mixer.cycle(12).blend(
+        'blog.Post', category=published_category, is_published=True)
+    url = f'/category/{published_category.slug}/'
+    response, counts = count_queries(client, url)
+    assert response.context['page_obj'].paginator.num_pages == 2
+    response, counts = count_queries(client, url)
+    assert not counts, (
+        'Убедитесь, что число постов категории берётся из кэша.')
+    assert response.context['page_obj'].paginator.num_pages == 2
+
+    mixer.cycle(9).blend(
+        'blog.Post', category=published_category, is_published=True)
+    response, counts = count_queries(client, url)
+    assert response.context['page_obj'].paginator.num_pages == 3, (
+        'Убедитесь, что публикация поста сбрасывает кэш счётчика.')
+
+
+def test_single_page_is_not_counted(mixer, client, published_category):
+    mixer.cycle(3).blend(
+        'blog.Post', category=published_category, is_published=True)
+    response, counts = count_queries(
+        client, f'/category/{published_category.slug}/')
+    assert len(response.context['page_obj']) == 3
+    assert not counts, (
+        'Убедитесь, что записи не подсчитываются, если номера страниц '
+        'не выводятся.')
+
+
+def test_profile_count_cached(mixer, client, user):
+    posts = mixer.cycle(11).blend('blog.Post', author=user)
+    url = f'/profile/{user.username}/'
+    count_queries(client, url)
+    posts[0].delete()
+    response, counts = count_queries(client, url)
+    assert counts, 'Убедитесь, что удаление поста сбрасывает кэш счётчика.'
+    page_obj = response.context['page_obj']
+    assert page_obj.paginator.num_pages == 1
+    assert not page_obj.has_next()
+
+
+def test_stale_count_keeps_posts(mixer, client, published_category):
+    from blog.pagination import CachedCountPaginator
+    from blog.models import Post
+
+    mixer.cycle(11).blend(
+        'blog.Post', category=published_category, is_published=True)
+    paginator = CachedCountPaginator(
+        Post.objects.order_by('id'), 10, 'test', 'stale',
+    )
+    paginator.count = 5
+    page = paginator.page(2)
+    assert len(page) == 1, (
+        'Убедитесь, что устаревший счётчик не прячет посты.')
+    assert paginator.page(1).has_next()
+
+
+def test_page_range_is_elided():
+    from django.core.paginator import Paginator
+    from blog.views import get_page_range
+
+    paginator = Paginator(range(500000), 10)
+    page_range = get_page_range(paginator.page(25000))
+    assert len(page_range) < 15, (
+        'Убедитесь, что пагинатор выводит только края и соседей '
+        'текущей страницы.')
+    assert page_range[0] == 1 and page_range[-1] == 50000
+    assert 25000 in page_range and paginator.ELLIPSIS in page_range
+
+
+def test_paginator_renders_page_range(mixer, client, published_category):
+    mixer.cycle(11).blend(
+        'blog.Post', category=published_category, is_published=True)
+    response = client.get(f'/category/{published_category.slug}/?page=2')
+    assert response.context['page_range'] == [1, 2]
+    assert 'href="?page=1"' in response.content.decode()
+
+
+@pytest.mark.parametrize('view', ['category', 'profile'])
+def test_page_out_of_range_shows_last(
+        mixer, client, user, published_category, view):
+    mixer.cycle(11).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True)
+    url = (
+        f'/category/{published_category.slug}/' if view == 'category'
+        else f'/profile/{user.username}/'
+    )
+    for page in ('999', '0'):
+        response, _ = count_queries(client, f'{url}?page={page}')
+        assert response.context['page_obj'].number == 2, (
+            'Убедитесь, что номер страницы за пределами списка ведёт на '
+            'последнюю страницу.')
+
+
+def test_stale_count_falls_back_to_first_page(mixer, published_category):
+    from blog.pagination import CachedCountPaginator
+    from blog.models import Post
+
+    mixer.blend('blog.Post', category=published_category)
+    paginator = CachedCountPaginator(
+        Post.objects.order_by('id'), 10, 'test', 'stale',
+    )
+    paginator.count = 50
+    page = paginator.get_page(999)
+    assert (page.number, len(page)) == (1, 1)
@@ -0,0 +1,49 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+TEXT = 'один два три четыре пять шесть семь восемь девять десять <b>\nконец'
+
+
+def test_text_rendered_on_save(
+        mixer, client, published_category, published_location):
+    post = mixer.blend(
+        'blog.Post', text=TEXT, is_published=True,
+        category=published_category, location=published_location)
+    assert post.excerpt == (
+        'один два три четыре пять шесть семь восемь девять десять …')
+    assert post.text_html == (
+        'один два три четыре пять шесть семь восемь девять десять '
+        '&lt;b&gt;<br>конец')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/')
+    assert not any(
+        '"blog_post"."text"' in query['sql'] for query in queries), (
+        'Убедитесь, что лента не загружает полный текст постов.')
+    assert post.excerpt in response.content.decode()
+    response = client.get(f'/posts/{post.id}/')
+    assert '&lt;b&gt;<br>конец' in response.content.decode()
+
+    post.text = 'новый текст'
+    post.save(update_fields=('text',))
+    post.refresh_from_db()
+    assert post.excerpt == 'новый текст'
+
+
+def test_render_posts_backfill(mixer):
+    post = mixer.blend('blog.Post', text='текст')
+    Post.objects.filter(pk=post.pk).update(excerpt='', text_html='')
+    call_command('render_posts', stdout=StringIO())
+    post.refresh_from_db()
+    assert post.excerpt == 'текст' and post.text_html == 'текст', (
+        'Убедитесь, что render_posts пересчитывает анонсы.')
@@ -0,0 +1,73 @@
+import pytest
+from django.test import override_settings
+
+from blog.ratelimit import LocalRateLimiter
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@override_settings(RATE_LIMITS={'blog:add_comment': (2, 60)})
+def test_comment_rate_limited(
+        user_client, another_user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/comment/'
+    for _ in range(2):
+        response = user_client.post(url, data={'text': 'Текст'})
+        assert response.status_code == 302
+    response = user_client.post(url, data={'text': 'Текст'})
+    assert response.status_code == 429, (
+        'Убедитесь, что при превышении лимита возвращается статус 429.')
+    assert int(response['Retry-After']) > 0
+    assert post.comment.count() == 2
+    response = another_user_client.post(url, data={'text': 'Текст'})
+    assert response.status_code == 302, (
+        'Убедитесь, что лимит считается для каждого клиента отдельно.')
+    assert user_client.get(f'/posts/{post.id}/').status_code == 200
+
+
+@override_settings(RATE_LIMITS={'login': (1, 60)})
+def test_login_rate_limited_by_ip(client):
+    data = {'username': 'nobody', 'password': 'wrong'}
+    assert client.post('/auth/login/', data=data).status_code == 200
+    response = client.post('/auth/login/', data=data)
+    assert response.status_code == 429
+
+
+@override_settings(LOAD_SHED_MAX_IN_FLIGHT=0)
+def test_load_shedding(user_client, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.post(
+        f'/posts/{post.id}/comment/', data={'text': 'Текст'})
+    assert response.status_code == 503, (
+        'Убедитесь, что при перегрузке пишущие запросы отклоняются.')
+    assert user_client.get(f'/posts/{post.id}/').status_code == 200
+
+
+@override_settings(
+    RATE_LIMITS={'login': (1, 60)}, RATE_LIMIT_TRUSTED_PROXIES=1)
+def test_login_rate_limited_by_forwarded_ip(client):
+    data = {'username': 'nobody', 'password': 'wrong'}
+    for address in ('10.0.0.1', '10.0.0.2'):
+        response = client.post(
+            '/auth/login/', data=data,
+            HTTP_X_FORWARDED_FOR=f'1.2.3.4, {address}')
+        assert response.status_code == 200, (
+            'Убедитесь, что за доверенным прокси клиент определяется по '
+            'X-Forwarded-For.')
+    response = client.post(
+        '/auth/login/', data=data, HTTP_X_FORWARDED_FOR='5.6.7.8, 10.0.0.1')
+    assert response.status_code == 429, (
+        'Убедитесь, что подделанный левый адрес X-Forwarded-For не '
+        'обходит лимит.')
+
+
+def test_local_buckets_bounded():
+    limiter = LocalRateLimiter()
+    limiter.max_buckets = 3
+    limiter.consume('first', 1, 60)
+    for key in ('a', 'b', 'c'):
+        limiter.consume(key, 1, 60)
+    assert list(limiter.buckets) == ['a', 'b', 'c'], (
+        'Убедитесь, что вытесняется самая давняя корзина.')
@@ -0,0 +1,18 @@
+from blog.management.commands import serve
+
+
+def test_respawn_backoff(monkeypatch):
+    now = [0]
+    monkeypatch.setattr(serve.time, 'monotonic', lambda: now[0])
+    command = serve.Command()
+    command.crashes = serve.deque()
+    delays = [command.crashed() for _ in range(serve.MAX_CRASHES)]
+    assert delays == [
+        serve.RESPAWN_DELAY * 2 ** n for n in range(serve.MAX_CRASHES)
+    ], 'Убедитесь, что пауза перед перезапуском воркера растёт вдвое.'
+    assert command.crashed() is None, (
+        'Убедитесь, что при частых падениях воркеров сервер '
+        'останавливается.')
+    now[0] = serve.CRASH_WINDOW * 2
+    assert command.crashed() == serve.RESPAWN_DELAY, (
+        'Убедитесь, что старые падения перестают учитываться.')
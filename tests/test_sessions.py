@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_clearsessions_in_batches():
+    now = timezone.now()
+    for i in range(5):
+        Session.objects.create(
+            session_key=f'expired{i}', session_data='',
+            expire_date=now - timedelta(days=1))
+    Session.objects.create(
+        session_key='alive', session_data='',
+        expire_date=now + timedelta(days=1))
+    call_command('clearsessions', batch_size=2, sleep=0)
+    assert list(Session.objects.values_list('session_key', flat=True)) == [
+        'alive'], (
+        'Убедитесь, что `clearsessions` удаляет только истёкшие сессии.')
+
+
+def test_session_refreshed_once_per_interval(settings, user_client):
+    settings.SESSION_REFRESH_INTERVAL = 3600
+    response = user_client.get('/pages/about/')
+    assert settings.SESSION_COOKIE_NAME in response.cookies
+    response = user_client.get('/pages/about/')
+    assert settings.SESSION_COOKIE_NAME not in response.cookies, (
+        'Убедитесь, что сессия не сохраняется на каждый запрос.')
@@ -0,0 +1,55 @@
+import gzip
+import re
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture
+def collected_static(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return tmp_path
+
+
+def test_collectstatic_hashes_and_compresses(collected_static):
+    hashed = list((collected_static / 'css').glob('bootstrap.min.*.css'))
+    assert hashed, 'Убедитесь, что collectstatic хеширует имена файлов.'
+    compressed = hashed[0].with_name(hashed[0].name + '.gz')
+    assert gzip.decompress(compressed.read_bytes()) == hashed[0].read_bytes()
+
+
+def test_static_served_precompressed(client, collected_static):
+    content = client.get('/').content.decode('utf-8')
+    assert re.search(r'/static/img/fav/favicon\.\w+\.ico', content), (
+        'Убедитесь, что в шаблонах используются хешированные имена.')
+
+    hashed = next((collected_static / 'css').glob('bootstrap.min.*.css'))
+    url = f'/static/css/{hashed.name}'
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Content-Type'] == 'text/css'
+    assert 'immutable' in response['Cache-Control']
+    assert response['Content-Disposition'] == (
+        f'inline; filename="{hashed.name}"'), (
+        'Убедитесь, что сжатый вариант отдаётся под исходным именем.')
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING='identity')
+    assert not response.has_header('Content-Encoding')
+
+    response = client.get('/static/css/bootstrap.min.css')
+    assert 'immutable' not in response['Cache-Control']
+
+
+def test_missing_manifest_entry_strict(settings, collected_static):
+    settings.STATIC_MANIFEST_STRICT = True
+    with pytest.raises(ValueError):
+        staticfiles_storage.stored_name('css/missing.css')
+    settings.STATIC_MANIFEST_STRICT = False
+    assert staticfiles_storage.stored_name('css/missing.css') == (
+        'css/missing.css')
@@ -0,0 +1,76 @@
+import datetime as dt
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import AuthorStats, CategoryStats
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def counts(model, pk):
+    stats = model.objects.get(pk=pk)
+    return stats.post_count, stats.comment_count, stats.last_post_date
+
+
+def test_stats_follow_events(
+        mixer, user, another_user, published_category, published_location):
+    first, second = mixer.cycle(2).blend(
+        'blog.Post', author=user, category=published_category,
+        location=published_location, is_published=True)
+    comment = mixer.blend('blog.Comment', post=first, author=another_user)
+    latest = max(first.pub_date, second.pub_date)
+    assert counts(AuthorStats, user.pk) == (2, 0, latest), (
+        'Убедитесь, что счётчики автора учитывают его публикации.')
+    assert counts(CategoryStats, published_category.pk) == (2, 1, latest)
+    assert counts(AuthorStats, another_user.pk)[1] == 1
+
+    second.is_published = False
+    second.save()
+    comment.delete()
+    assert counts(AuthorStats, user.pk) == (1, 0, first.pub_date), (
+        'Убедитесь, что снятие с публикации уменьшает счётчики.')
+    assert counts(CategoryStats, published_category.pk) == (
+        1, 0, first.pub_date)
+    assert counts(AuthorStats, another_user.pk)[1] == 0
+
+    first.delete()
+    assert counts(AuthorStats, user.pk) == (0, 0, None)
+
+
+def test_reconcile_stats(mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + dt.timedelta(days=1))
+    assert not AuthorStats.objects.filter(
+        user=user, post_count__gt=0
+    ).exists(), (
+        'Убедитесь, что отложенная публикация не попадает в счётчики.')
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - dt.timedelta(days=1))
+    call_command('reconcile_stats', stdout=StringIO())
+    assert counts(AuthorStats, user.pk)[0] == 1, (
+        'Убедитесь, что сверка подхватывает наступившие публикации.')
+
+
+def test_profile_reads_stats(client, mixer, user, published_category):
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f'/profile/{user.username}/')
+    assert response.context['stats'].post_count == 1
+    assert not [
+        query for query in queries
+        if 'FROM "blog_authorstats"' in query['sql']
+    ], (
+        'Убедитесь, что счётчики загружаются вместе с пользователем.')
+    response = client.get(f'/category/{published_category.slug}/')
+    assert response.context['stats'].post_count == 1
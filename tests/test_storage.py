@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+from blog.models import MediaFile
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+IMAGE_BYTES = bytes(range(256)) * 4
+OTHER_BYTES = bytes(reversed(range(256))) * 4
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def ref_count(name):
+    return MediaFile.objects.get(name=name).ref_count
+
+
+def stored_files(root):
+    return [
+        name for _, _, names in os.walk(root / 'cas') for name in names
+    ]
+
+
+def test_duplicates_stored_once(mixer, media_root):
+    first, second = mixer.cycle(2).blend('blog.Post')
+    existing = len(stored_files(media_root))
+    first.image.save('a.JPG', ContentFile(IMAGE_BYTES))
+    second.image.save('b.jpg', ContentFile(IMAGE_BYTES))
+    assert first.image.name == second.image.name, (
+        'Убедитесь, что одинаковые файлы хранятся под одним именем.')
+    assert first.image.name.startswith('cas/')
+    assert len(stored_files(media_root)) == existing + 1
+    assert ref_count(first.image.name) == 2
+
+    name = first.image.name
+    second.image.save('c.jpg', ContentFile(OTHER_BYTES))
+    assert ref_count(name) == 1, (
+        'Убедитесь, что замена изображения уменьшает число ссылок.')
+    assert ref_count(second.image.name) == 1
+    first.delete()
+    assert ref_count(name) == 0
+
+
+def test_temporary_upload_moved(mixer, media_root):
+    post = mixer.blend('blog.Post')
+    upload = TemporaryUploadedFile('big.jpg', 'image/jpeg', 0, None)
+    upload.write(IMAGE_BYTES)
+    upload.seek(0)
+    post.image.save(upload.name, upload)
+    with post.image.open('rb') as file:
+        assert file.read() == IMAGE_BYTES
+    assert ref_count(post.image.name) == 1
@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import PostRank
+from blog.trending import apply_views
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def trending_ids(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/trending/')
+    assert len(queries) == 1, (
+        'Убедитесь, что лента популярного строится одним запросом.')
+    return [post.id for post in response.context['post_list']]
+
+
+def test_trending_follows_events(
+        mixer, client, user, published_category, published_location):
+    quiet, busy = mixer.cycle(2).blend(
+        'blog.Post', category=published_category,
+        location=published_location)
+    quiet.pub_date = busy.pub_date
+    quiet.save()
+    busy.refresh_from_db()
+
+    comments = mixer.cycle(2).blend('blog.Comment', post=busy, author=user)
+    assert trending_ids(client)[:2] == [busy.id, quiet.id]
+    assert PostRank.objects.get(post=busy).comment_count == 2
+
+    for comment in comments:
+        comment.delete()
+    apply_views({quiet.id: 50})
+    assert trending_ids(client)[:2] == [quiet.id, busy.id], (
+        'Убедитесь, что рейтинг учитывает просмотры и удаление '
+        'комментариев.')
+
+
+def test_trending_hides_unlisted(mixer, client, published_category):
+    post = mixer.blend('blog.Post', category=published_category)
+    assert post.id in trending_ids(client)
+    published_category.is_published = False
+    published_category.save()
+    assert post.id not in trending_ids(client)
+    published_category.is_published = True
+    published_category.save()
+    post.is_published = False
+    post.save()
+    assert post.id not in trending_ids(client)
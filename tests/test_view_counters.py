@@ -0,0 +1,80 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.counters import CacheViewCounter, LocalViewCounter
+from blog.signals import views_flushed
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.mark.parametrize('counter_cls', [LocalViewCounter, CacheViewCounter])
+def test_views_flushed_in_one_update(mixer, counter_cls, published_category):
+    cache.clear()
+    posts = mixer.cycle(3).blend('blog.Post', category=published_category)
+    counter = counter_cls()
+    for post, hits in zip(posts, (5, 1, 0)):
+        for _ in range(hits):
+            counter.increment(post.id)
+    flushed = []
+    views_flushed.connect(
+        lambda counts, **kwargs: flushed.append(counts), weak=False,
+        dispatch_uid='test_views_flushed')
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            counter.flush()
+    finally:
+        views_flushed.disconnect(dispatch_uid='test_views_flushed')
+    updates = [
+        q for q in queries if q['sql'].startswith('UPDATE "blog_post"')]
+    assert len(updates) == 1, (
+        'Убедитесь, что буфер просмотров сбрасывается одним UPDATE.')
+    for post in posts:
+        post.refresh_from_db()
+    assert [post.views for post in posts] == [5, 1, 0]
+    assert flushed == [{posts[0].id: 5, posts[1].id: 1}]
+    assert counter.flush() == 0
+
+
+def test_detail_view_counts(
+        settings, client, post_with_published_location):
+    settings.VIEW_COUNTER_FLUSH_THRESHOLD = 1
+    post = post_with_published_location
+    client.get(f'/posts/{post.id}/')
+    client.get(f'/posts/{post.id}/')
+    post.refresh_from_db()
+    assert post.views == 2, (
+        'Убедитесь, что просмотры страницы публикации учитываются.')
+
+
+def test_save_keeps_flushed_views(mixer, published_category):
+    post = mixer.blend('blog.Post', category=published_category)
+    counter = LocalViewCounter()
+    counter.increment(post.id)
+    counter.flush()
+    post.title = 'Новый заголовок'
+    post.save()
+    post.refresh_from_db()
+    assert (post.title, post.views) == ('Новый заголовок', 1), (
+        'Убедитесь, что сохранение поста не затирает просмотры, '
+        'записанные после его загрузки.')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_views_flushed_in_background(settings, mixer, published_category):
+    settings.VIEW_COUNTER_FLUSH_IN_BACKGROUND = True
+    settings.VIEW_COUNTER_FLUSH_THRESHOLD = 1
+    post = mixer.blend('blog.Post', category=published_category)
+    counter = LocalViewCounter()
+    counter.increment(post.id)
+    with CaptureQueriesContext(connection) as queries:
+        counter.maybe_flush()
+    assert not queries, (
+        'Убедитесь, что сброс просмотров после запроса идёт в отдельном '
+        'потоке.')
+    counter.flusher.join()
+    post.refresh_from_db()
+    assert post.views == 1
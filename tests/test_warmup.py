@@ -0,0 +1,14 @@
+import pytest
+from django.core.management import call_command
+from django.template import engines
+
+
+@pytest.mark.django_db
+def test_warmup_fills_template_cache(capsys):
+    engine = engines['django'].engine
+    cached_loader = engine.template_loaders[0]
+    cached_loader.reset()
+    call_command('warmup')
+    assert 'blog/detail.html' in cached_loader.get_template_cache, (
+        'Убедитесь, что `warmup` компилирует шаблоны в кеш загрузчика.')
+    assert 'Шаблонов:' in capsys.readouterr().out